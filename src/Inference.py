@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
-import joblib
 import os
 import sys
 
+from startup import STARTUP_TIMER, headless_mode
+
+# Carga do modelo e cache de predições compartilhados com as páginas em pages/
+from dashboard_resources import load_prediction_cache, start_model_loader
+
 import sys
 import subprocess
 import os
@@ -24,8 +28,8 @@ def check_environment():
         print("   Execute: pip install scikit-learn==1.7.2")
         return False
 
-# Executar verificação
-if not check_environment():
+# Executar verificação (em modo headless nunca bloqueia esperando input())
+if not headless_mode() and not check_environment():
     print("\nDica: Use o script run_app.ps1 para rodar no ambiente virtual correto")
     response = input("\nContinuar mesmo assim? (s/n): ").lower()
     if response != 's':
@@ -45,31 +49,14 @@ st.markdown("---")
 st.markdown("**Versão do modelo:** scikit-learn 1.7.2")
 st.markdown("**Status:** ✅ Modelo compatível carregado")
 
-# Carregar o modelo
-@st.cache_resource
+# Carga do modelo em segundo plano: a página e o formulário aparecem enquanto ela
+# roda; só o envio do formulário (e a análise de sensibilidade) esperam pelo modelo
+loader = start_model_loader()
+
 def load_model_1_6_1():
-    alternative_paths = [
-        os.path.join("Model", "model.joblib"),
-        os.path.join("..", "Model", "model.joblib"),
-        os.path.join(os.path.dirname(__file__), "..", "Model", "model.joblib"),
-        "model.joblib"
-    ]
-    
-    model_path = None
-    
-    # Busca o arquivo nos caminhos da lista
-    for path in alternative_paths:
-        if os.path.exists(path):
-            model_path = path
-            break
-            
     try:
-        if not model_path:
-            # Se não achou em nenhum lugar, avisa onde tentou por último
-            raise FileNotFoundError("Não foi possível localizar 'model.joblib' nas pastas padrão.")
-        
-        # Carregar o modelo usando joblib
-        model = joblib.load(model_path)
+        # Espera a thread de carga (instantâneo depois da primeira vez)
+        model = loader.result()
         return model, "✅ Modelo original carregado com sucesso!"
         
     except Exception as e:
@@ -77,8 +64,19 @@ def load_model_1_6_1():
         st.error(f"Erro técnico ao carregar: {str(e)}")
         return None, f"❌ Erro: {str(e)}"
 
-# Carregar o modelo
-model, status_msg = load_model_1_6_1()
+def wait_for_model():
+    # Bloqueia até o modelo ficar pronto; se a carga falhou (erro já exibido), para
+    model, _ = load_model_1_6_1()
+    if model is None:
+        st.stop()
+    return model
+
+# Estado atual da carga, sem esperar por ela
+if loader.ready:
+    model, status_msg = load_model_1_6_1()
+else:
+    model, status_msg = None, "⏳ Carregando o modelo em segundo plano..."
+prediction_cache = load_prediction_cache(model, loader.model_path) if model is not None else None
 
 # Sidebar com informações
 with st.sidebar:
@@ -91,6 +89,16 @@ with st.sidebar:
     except:
         pass
     
+    if prediction_cache is not None:
+        cache_stats = prediction_cache.stats()
+        st.write(
+            f"**Cache de predições:** {cache_stats['size']}/{cache_stats['maxsize']} "
+            f"({cache_stats['hit_rate']:.0%} de acertos)"
+        )
+    
+    with st.expander("⏱️ Tempo de inicialização"):
+        st.code(STARTUP_TIMER.report())
+    
     st.markdown("---")
     st.markdown("**Versões compatíveis:**")
     st.markdown("- scikit-learn: 1.7.2")
@@ -101,8 +109,8 @@ with st.sidebar:
     st.markdown("⚠️ **Aviso importante:**")
     st.markdown("Esta ferramenta é para fins educacionais. Consulte sempre um médico para diagnóstico adequado.")
 
-# Interface principal apenas se o modelo foi carregado
-if model is not None:
+# Interface principal, a menos que a carga do modelo já tenha falhado
+if model is not None or not loader.ready:
     st.success("✅ Sistema pronto para análise!")
     
     # Seção de entrada de dados
@@ -147,6 +155,51 @@ if model is not None:
             key="slope"
         )
     
+    # Converter dados do formulário para formato do modelo
+    
+    # Converter sexo
+    sexo_cod = 'M' if "Masculino" in sexo else 'F'
+    
+    # Extrair código do tipo de dor
+    tipo_dor_cod = tipo_dor.split(' ')[0]  # Pega "ASY", "ATA", etc
+    
+    # Converter glicose
+    glicose_cod = 1 if glicose == "Sim" else 0
+    
+    # Extrair código do eletro
+    if "LVH" in eletro:
+        eletro_cod = "LVH"
+    elif "ST" in eletro:
+        eletro_cod = "ST"
+    else:
+        eletro_cod = "Normal"
+    
+    # Converter angina
+    angina_cod = 'Y' if "Sim" in angina else 'N'
+    
+    # Extrair código do slope
+    if "Up" in slope:
+        slope_cod = "Up"
+    elif "Down" in slope:
+        slope_cod = "Down"
+    else:
+        slope_cod = "Flat"
+    
+    # Criar dicionário com os dados
+    dados_paciente = {
+        'Age': idade,
+        'Sex': sexo_cod,
+        'ChestPainType': tipo_dor_cod,
+        'RestingBP': pressao,
+        'Cholesterol': colesterol,
+        'FastingBS': glicose_cod,
+        'RestingECG': eletro_cod,
+        'MaxHR': freq_max,
+        'ExerciseAngina': angina_cod,
+        'Oldpeak': oldpeak,
+        'ST_Slope': slope_cod
+    }
+    
     # Botão de análise
     st.markdown("---")
     col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
@@ -162,58 +215,17 @@ if model is not None:
     # Processar quando o botão for clicado
     if analisar:
         with st.spinner("Processando análise..."):
-            # Converter dados para formato do modelo
-            
-            # Converter sexo
-            sexo_cod = 'M' if "Masculino" in sexo else 'F'
-            
-            # Extrair código do tipo de dor
-            tipo_dor_cod = tipo_dor.split(' ')[0]  # Pega "ASY", "ATA", etc
-            
-            # Converter glicose
-            glicose_cod = 1 if glicose == "Sim" else 0
-            
-            # Extrair código do eletro
-            if "LVH" in eletro:
-                eletro_cod = "LVH"
-            elif "ST" in eletro:
-                eletro_cod = "ST"
-            else:
-                eletro_cod = "Normal"
-            
-            # Converter angina
-            angina_cod = 'Y' if "Sim" in angina else 'N'
-            
-            # Extrair código do slope
-            if "Up" in slope:
-                slope_cod = "Up"
-            elif "Down" in slope:
-                slope_cod = "Down"
-            else:
-                slope_cod = "Flat"
-            
-            # Criar dicionário com os dados
-            dados_paciente = {
-                'Age': idade,
-                'Sex': sexo_cod,
-                'ChestPainType': tipo_dor_cod,
-                'RestingBP': pressao,
-                'Cholesterol': colesterol,
-                'FastingBS': glicose_cod,
-                'RestingECG': eletro_cod,
-                'MaxHR': freq_max,
-                'ExerciseAngina': angina_cod,
-                'Oldpeak': oldpeak,
-                'ST_Slope': slope_cod
-            }
-            
+            model = wait_for_model()
+            prediction_cache = load_prediction_cache(model, loader.model_path)
+
             # Converter para DataFrame
             df_paciente = pd.DataFrame([dados_paciente])
             
             try:
-                # Fazer previsão
-                previsao = model.predict(df_paciente)[0]
-                probabilidade = model.predict_proba(df_paciente)[0]
+                # Fazer previsão (uma única passada pelo pipeline, ou direto do cache)
+                resultado = prediction_cache.score(dados_paciente)
+                previsao = resultado["label"]
+                probabilidade = [1.0 - resultado["probability"], resultado["probability"]]
                 
                 # Mostrar resultados
                 st.markdown("---")
@@ -263,7 +275,7 @@ if model is not None:
                     )
                 
                 with col_met3:
-                    confianca = max(probabilidade)
+                    confianca = resultado["confidence"]
                     st.metric(
                         "Confiança do modelo", 
                         f"{confianca:.1%}",
@@ -275,19 +287,85 @@ if model is not None:
                     st.dataframe(df_paciente)
                     st.markdown(f"**Previsão:** {previsao} (0 = Saudável, 1 = Risco)")
                     st.markdown(f"**Probabilidades:** {probabilidade}")
+                    st.markdown(f"**Faixa de risco:** {resultado['risk_band']}")
                 
                 # Seção de interpretação
                 st.markdown("### 💡 Interpretação dos Resultados")
+                st.markdown(f"**Faixa de risco deste paciente:** {resultado['risk_band'].upper()}")
                 st.markdown("""
                 - **Probabilidade < 30%:** Risco baixo, mantenha hábitos saudáveis
                 - **Probabilidade 30-70%:** Risco moderado, recomendável avaliação médica
                 - **Probabilidade > 70%:** Risco alto, procure atendimento especializado
                 """)
-                
+
+                # Contribuição de cada variável (TreeSHAP do XGBoost, memorizada no cache)
+                st.markdown("### 🔍 Por que este resultado?")
+                import matplotlib.pyplot as plt
+
+                contribuicoes = prediction_cache.explain(dados_paciente).drop("base_value")
+                contribuicoes = contribuicoes.reindex(contribuicoes.abs().sort_values().index)
+
+                fig, ax = plt.subplots(figsize=(7, 4))
+                ax.barh(
+                    contribuicoes.index,
+                    contribuicoes.values,
+                    color=["#d62728" if v > 0 else "#2ca02c" for v in contribuicoes.values]
+                )
+                ax.axvline(0, color="gray", linewidth=0.8)
+                ax.set_xlabel("Contribuição para o risco (log-odds)")
+                st.pyplot(fig)
+                plt.close(fig)
+                st.caption(
+                    "Barras vermelhas aumentaram o risco estimado; verdes diminuíram. "
+                    "Valores calculados com TreeSHAP a partir das árvores do modelo."
+                )
+
             except Exception as e:
                 st.error(f"❌ Erro ao fazer previsão: {str(e)}")
                 st.info("Verifique se os dados estão no formato correto.")
     
+    # Seção de análise de sensibilidade ("e se?")
+    with st.expander("📉 Análise de sensibilidade (e se?)"):
+        st.markdown(
+            "Veja como o risco muda quando uma ou duas variáveis variam, "
+            "mantendo os demais dados do formulário fixos."
+        )
+        
+        from sensitivity import SWEEP_RANGES, sweep_1d, sweep_2d
+        
+        variaveis = list(SWEEP_RANGES)
+        col_sens1, col_sens2 = st.columns(2)
+        with col_sens1:
+            var_x = st.selectbox("Variável principal", variaveis, index=variaveis.index("Cholesterol"), key="sens_x")
+        with col_sens2:
+            var_y = st.selectbox("Segunda variável (opcional)", ["Nenhuma"] + variaveis, key="sens_y")
+        
+        if st.button("📈 Gerar curva de risco", key="sens_btn"):
+            # A grade inteira é pontuada em uma única chamada ao modelo
+            model = wait_for_model()
+            if var_y == "Nenhuma" or var_y == var_x:
+                curva = sweep_1d(model, dados_paciente, var_x)
+                st.line_chart(curva.set_index(var_x)["probability"])
+            else:
+                import matplotlib.pyplot as plt
+                
+                mapa = sweep_2d(model, dados_paciente, var_x, var_y)
+                fig, ax = plt.subplots(figsize=(7, 5))
+                im = ax.imshow(
+                    mapa.values,
+                    origin="lower",
+                    aspect="auto",
+                    cmap="RdYlGn_r",
+                    vmin=0.0,
+                    vmax=1.0,
+                    extent=[*SWEEP_RANGES[var_x], *SWEEP_RANGES[var_y]]
+                )
+                ax.set_xlabel(var_x)
+                ax.set_ylabel(var_y)
+                fig.colorbar(im, ax=ax, label="Probabilidade de risco")
+                st.pyplot(fig)
+                plt.close(fig)
+    
     # Seção de exemplos rápidos
     with st.expander("🚀 Testar com casos exemplo"):
         st.markdown("**Teste rápido com dados predefinidos:**")
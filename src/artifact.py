@@ -0,0 +1,174 @@
+# artifact.py
+# Responsável por:
+# - Exportar o pipeline treinado em um diretório de artefato versionado, sem pickle:
+#     booster.ubj        -> booster do XGBoost no formato binário nativo (UBJSON)
+#     preprocessor.json  -> parâmetros ajustados do pré-processamento (medianas,
+#                           médias/escalas, categorias do one-hot)
+#     manifest.json      -> versão do formato, schema das features, hash dos dados
+#                           de treino, métricas e versões das bibliotecas
+#     trees.npz          -> as mesmas árvores em tabelas NumPy (numpy_trees.py), para
+#                           carregar com backend="numpy" sem o xgboost instalado
+# - Reconstruir um "scorer" a partir desses arquivos sem desserializar objetos do sklearn
+
+# Obs.: o formato nativo do XGBoost é estável entre versões, e o pré-processamento
+# vira JSON puro. Com isso a carga é mais rápida, ocupa menos memória e não depende
+# da versão exata do scikit-learn usada no treino (ver check_environment no Inference.py).
+
+import hashlib
+import json
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from fast_preprocess import CompiledPreprocessor
+from numpy_trees import TREES_FILE, NumpyTreeEnsemble
+
+
+ARTIFACT_FORMAT_VERSION = 1
+
+BOOSTER_FILE = "booster.ubj"
+PREPROCESSOR_FILE = "preprocessor.json"
+MANIFEST_FILE = "manifest.json"
+
+
+def file_sha256(path, block_size: int = 1 << 20) -> str:
+
+    # Hash do arquivo lido em blocos (funciona para arquivos maiores que a RAM).
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _library_versions() -> dict:
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for name in ("xgboost", "sklearn", "pandas"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+# 1) Exportação
+
+def export_artifact(pipeline, artifact_dir, data_path=None, metrics=None, threshold: float = 0.5) -> Path:
+    """
+    Grava o pipeline treinado (preprocess + model) como diretório de artefato.
+    Retorna o caminho do diretório.
+    """
+
+    compiled = CompiledPreprocessor.from_pipeline(pipeline)
+    booster = pipeline.named_steps["model"].get_booster()
+    return write_artifact(compiled, booster, artifact_dir, data_path, metrics, threshold)
+
+
+def write_artifact(compiled, booster, artifact_dir, data_path=None, metrics=None, threshold: float = 0.5) -> Path:
+
+    # Grava pré-processamento compilado + booster já treinado (usado também pelo
+    # treino out-of-core, que não passa por um Pipeline do sklearn).
+
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+
+    booster.save_model(artifact_dir / BOOSTER_FILE)
+    NumpyTreeEnsemble.from_booster(booster).save(artifact_dir / TREES_FILE)
+    with open(artifact_dir / PREPROCESSOR_FILE, "w", encoding="utf-8") as f:
+        json.dump(compiled.to_dict(), f, indent=2)
+
+    manifest = {
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        # Versão do modelo = hash do booster: muda sempre que as árvores mudam
+        "model_version": file_sha256(artifact_dir / BOOSTER_FILE)[:16],
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "features": {
+            "numerical": compiled.num_features,
+            "categorical": compiled.cat_features,
+            "categories": dict(zip(compiled.cat_features, compiled.categories)),
+            "n_outputs": compiled.n_outputs
+        },
+        "model": {
+            "type": "xgboost",
+            "n_trees": booster.num_boosted_rounds(),
+            "threshold": threshold
+        },
+        "training_data": {
+            "path": str(data_path) if data_path is not None else None,
+            "sha256": file_sha256(data_path) if data_path is not None else None
+        },
+        "metrics": metrics or {},
+        "library_versions": _library_versions()
+    }
+    with open(artifact_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return artifact_dir
+
+
+# 2) Carga
+
+class ArtifactScorer:
+
+    # Substituto do Pipeline para inferência: expõe predict_proba/predict com a mesma
+    # assinatura, então funciona com scoring.score_batch, score_patient etc.
+
+    def __init__(self, preprocessor: CompiledPreprocessor, booster, manifest: dict):
+        self.preprocessor = preprocessor
+        self.booster = booster
+        self.manifest = manifest
+
+    @property
+    def model_version(self) -> str:
+        return self.manifest["model_version"]
+
+    def transform(self, X) -> np.ndarray:
+        if isinstance(X, dict):
+            return self.preprocessor.transform_one(X)
+        return self.preprocessor.transform_columns(X)
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = self.booster.inplace_predict(self.transform(X))
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        threshold = self.manifest["model"]["threshold"]
+        return (self.predict_proba(X)[:, 1] >= threshold).astype(np.int64)
+
+
+def load_artifact(artifact_dir, backend: str = "xgboost") -> ArtifactScorer:
+
+    # Reconstrói o scorer a partir do diretório, sem unpickling.
+    # backend="numpy" avalia as árvores com NumPy puro (trees.npz), sem importar o xgboost.
+
+    if backend not in ("xgboost", "numpy"):
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    artifact_dir = Path(artifact_dir)
+    with open(artifact_dir / MANIFEST_FILE, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(
+            f"Formato de artefato {manifest.get('format_version')} não suportado "
+            f"(esperado {ARTIFACT_FORMAT_VERSION})"
+        )
+
+    with open(artifact_dir / PREPROCESSOR_FILE, encoding="utf-8") as f:
+        preprocessor = CompiledPreprocessor.from_dict(json.load(f))
+
+    if backend == "numpy":
+        if not (artifact_dir / TREES_FILE).exists():
+            raise FileNotFoundError(f"{TREES_FILE} ausente em {artifact_dir}; exporte o artefato novamente")
+        return ArtifactScorer(preprocessor, NumpyTreeEnsemble.load(artifact_dir / TREES_FILE), manifest)
+
+    # O import do xgboost fica aqui para não pesar em quem só exporta metadados
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(artifact_dir / BOOSTER_FILE)
+
+    return ArtifactScorer(preprocessor, booster, manifest)
@@ -0,0 +1,226 @@
+# batch_score.py
+# Responsável por:
+# - Ler arquivos grandes de pacientes (CSV ou Parquet) em blocos de tamanho fixo
+# - Aplicar preprocess_dataframe + pipeline salvo (Model/model.joblib) em cada bloco
+# - Distribuir os blocos entre um pool de processos (um por núcleo)
+# - Escrever o resultado (label, probabilidade, confiança e faixa de risco) em
+#   streaming, na mesma ordem da entrada
+# - Validar cada bloco antes do modelo (validation.py): linhas rejeitadas saem sem
+#   pontuação e com os motivos na coluna rejection_reasons
+# - Opcionalmente, resumir as features de cada bloco num sketch de drift (drift.py)
+#   no próprio worker; o processo principal só soma os sketches e grava o relatório
+
+# Obs.: a memória fica limitada a (nº de blocos em andamento x chunk_size),
+# independente do tamanho do arquivo. Nunca fazemos um pd.read_csv completo.
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from drift import compare, load_reference, reference_path_for
+from scoring import DEFAULT_THRESHOLD, build_result_frame, score_batch
+from validation import validate_batch
+
+
+DEFAULT_MODEL_PATH = "../Model/model.joblib"
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Modelo carregado uma única vez por processo (inicializador do pool)
+_MODEL = None
+_THRESHOLD = DEFAULT_THRESHOLD
+_VALIDATE = True
+_DRIFT_REFERENCE = None
+
+
+# 1) Leitura em blocos
+
+def _is_parquet(path) -> bool:
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def iter_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+
+    # Gera DataFrames de no máximo `chunk_size` linhas a partir de CSV ou Parquet.
+
+    if _is_parquet(path):
+        # pyarrow é opcional: só é necessário para arquivos Parquet
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+# 2) Escrita em streaming
+
+class ChunkWriter:
+
+    # Escreve blocos sucessivos em CSV (append) ou Parquet (ParquetWriter).
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._parquet_writer = None
+        self._first = True
+
+    def write(self, df: pd.DataFrame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+# 3) Pontuação de um bloco
+
+def _init_worker(model_path: str, threshold: float = DEFAULT_THRESHOLD, validate: bool = True, drift_reference=None):
+
+    # Carrega o pipeline uma vez por processo. Cada processo já ocupa um núcleo,
+    # então o XGBoost roda com 1 thread para não disputar CPU entre processos.
+
+    global _MODEL, _THRESHOLD, _VALIDATE, _DRIFT_REFERENCE
+    _MODEL = joblib.load(model_path)
+    _MODEL.named_steps["model"].set_params(n_jobs=1)
+    _THRESHOLD = threshold
+    _VALIDATE = validate
+    _DRIFT_REFERENCE = drift_reference
+
+
+def score_validated(model, chunk: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD):
+
+    # Valida o bloco e pontua só as linhas aceitas; as rejeitadas ficam com NaN nas
+    # colunas de resultado, na posição original, e com os motivos em rejection_reasons.
+    # Retorna (bloco pontuado, linhas aceitas). Também usado pelo upload do dashboard.
+
+    validation = validate_batch(chunk)
+    if len(validation.accepted):
+        scores = score_batch(model, validation.accepted, threshold).reindex(chunk.index)
+    else:
+        # Bloco todo rejeitado: o pipeline não aceita um lote vazio
+        scores = build_result_frame([], threshold).reindex(chunk.index)
+    return pd.concat([chunk, scores, validation.reasons], axis=1), validation.accepted
+
+
+def _score_chunk(chunk: pd.DataFrame):
+
+    # Retorna (bloco pontuado, sketch de drift do bloco ou None).
+
+    if not _VALIDATE:
+        scored = pd.concat([chunk, score_batch(_MODEL, chunk, _THRESHOLD)], axis=1)
+        accepted = chunk
+    else:
+        scored, accepted = score_validated(_MODEL, chunk, _THRESHOLD)
+
+    if _DRIFT_REFERENCE is None:
+        return scored, None
+    return scored, _DRIFT_REFERENCE.empty_copy().update(accepted)
+
+
+# 4) Função principal
+
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str = DEFAULT_MODEL_PATH,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    n_jobs: int = -1,
+    threshold: float = DEFAULT_THRESHOLD,
+    validate: bool = True,
+    drift_report: str = None
+) -> int:
+    """
+    Pontua um arquivo de pacientes bloco a bloco e grava o resultado em output_path
+    (CSV ou Parquet, pela extensão). Retorna o número de linhas processadas
+    (com validate=True, as rejeitadas saem com a coluna rejection_reasons preenchida).
+    Com drift_report, compara o arquivo com o drift_reference.json do modelo (PSI/KS
+    por feature, ver drift.py) e grava o relatório em JSON nesse caminho.
+    """
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    reference = load_reference(reference_path_for(model_path)) if drift_report else None
+    window = reference.empty_copy() if reference is not None else None
+    writer = ChunkWriter(output_path)
+    n_rows = 0
+
+    def collect(result):
+        nonlocal n_rows
+        scored, sketch = result
+        writer.write(scored)
+        n_rows += len(scored)
+        if sketch is not None:
+            window.merge(sketch)
+
+    try:
+        if n_jobs == 1:
+            _init_worker(model_path, threshold, validate, reference)
+            for chunk in iter_chunks(input_path, chunk_size):
+                collect(_score_chunk(chunk))
+        else:
+            # Janela limitada de blocos em andamento: mantém a memória constante
+            # e preserva a ordem de saída (escrevemos sempre o bloco mais antigo).
+            max_in_flight = 2 * n_jobs
+            pending = deque()
+
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(model_path, threshold, validate, reference)
+            ) as executor:
+                for chunk in iter_chunks(input_path, chunk_size):
+                    pending.append(executor.submit(_score_chunk, chunk))
+                    if len(pending) >= max_in_flight:
+                        collect(pending.popleft().result())
+
+                while pending:
+                    collect(pending.popleft().result())
+    finally:
+        writer.close()
+
+    if reference is not None:
+        with open(drift_report, "w", encoding="utf-8") as f:
+            json.dump(compare(reference, window), f, indent=2)
+
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação em lote de arquivos de pacientes.")
+    parser.add_argument("input", help="Arquivo de entrada (.csv ou .parquet)")
+    parser.add_argument("output", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Caminho do model.joblib")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--jobs", type=int, default=-1, help="Nº de processos (-1 = todos os núcleos)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Limiar de decisão")
+    parser.add_argument("--no-validate", action="store_true", help="Pula a validação de faixas/categorias")
+    parser.add_argument("--drift-report", default=None, help="Grava o relatório de drift (JSON) neste caminho")
+    args = parser.parse_args(argv)
+
+    n_rows = score_file(
+        args.input, args.output, args.model, args.chunk_size, args.jobs, args.threshold, not args.no_validate,
+        args.drift_report
+    )
+    print(f"{n_rows} linhas pontuadas em: {Path(args.output).resolve()}")
+
+
+if __name__ == "__main__":
+    main()
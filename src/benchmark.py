@@ -0,0 +1,305 @@
+# benchmark.py
+# Responsável por:
+# - Medir prepare_data, train_and_save_model, carga do modelo e latência/throughput
+#   do predict_proba (1 linha até lotes de 100k) em bases de 918 linhas a milhões
+#   (bases maiores que o heart.csv vêm do gerador sintético, synthetic.py)
+# - Reportar percentis (p50/p95/p99), linhas/s e pico de memória (RSS) por caso
+# - Salvar os resultados em JSON e comparar com um baseline, apontando regressões
+
+# Cada caso roda num processo novo (spawn), então o pico de RSS é do próprio caso
+# e um caso não aquece caches para o seguinte.
+
+# O prepare_data é medido em dois casos, porque a leitura usa o cache Parquet do
+# ingest.py (com pyarrow): "prepare_data_cold" apaga o cache antes de cada repetição
+# (leitura do CSV + gravação do Parquet), "prepare_data_warm" o preenche uma vez fora
+# da medição e só lê dele. Misturar os dois num caso só daria percentis sem sentido.
+
+# Exemplos:
+#   python benchmark.py --quick
+#   python benchmark.py --sizes 918 100000 1000000 --output bench_atual.json
+#   python benchmark.py --quick --baseline bench_base.json --tolerance 0.2
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_DATA_PATH = "../Data/heart.csv"
+DEFAULT_SIZES = (918, 10_000, 100_000, 1_000_000)
+DEFAULT_BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+QUICK_SIZES = (918, 10_000)
+QUICK_BATCH_SIZES = (1, 100, 10_000)
+
+
+# 1) Medição
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        # Windows: sem getrusage
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(times, rows_per_call: int = None) -> dict:
+    t = np.asarray(times) * 1000.0
+    summary = {
+        "repeats": len(t),
+        "mean_ms": float(t.mean()),
+        "p50_ms": float(np.percentile(t, 50)),
+        "p95_ms": float(np.percentile(t, 95)),
+        "p99_ms": float(np.percentile(t, 99)),
+        "min_ms": float(t.min())
+    }
+    if rows_per_call:
+        summary["rows_per_s"] = rows_per_call / (summary["p50_ms"] / 1000.0)
+    return summary
+
+
+def _repeat(fn, repeats: int, min_time: float = 0.0, setup=None):
+
+    # setup (opcional) roda antes de cada chamada, fora da medição.
+
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < repeats or time.perf_counter() < deadline:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# 2) Dados de tamanho arbitrário
+
+def _count_rows(path) -> int:
+
+    # Nº de linhas de dados do CSV (sem o cabeçalho).
+
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for _ in f) - 1
+
+
+def make_dataset(source_path: str, n_rows: int, out_dir: str, seed: int = 42) -> str:
+
+    # Gera n_rows pacientes sintéticos com as distribuições do heart.csv (synthetic.py).
+    # A base original é usada como está quando n_rows é o seu próprio tamanho.
+
+    from synthetic import fit_profile_from_csv, write_synthetic
+
+    if n_rows == _count_rows(source_path):
+        return source_path
+
+    path = Path(out_dir) / f"heart_{n_rows}.csv"
+    if not path.exists():
+        write_synthetic(path, n_rows, fit_profile_from_csv(source_path), seed=seed)
+    return str(path)
+
+
+# 3) Casos (executados no processo filho)
+
+def _case_prepare_data(data_path, repeats, warm: bool):
+    from ingest import has_pyarrow, parquet_cache_path
+    from preprocessing import prepare_data
+
+    n_rows = _count_rows(data_path)
+    cache_file = parquet_cache_path(data_path) if has_pyarrow() else None
+    existed = cache_file is not None and cache_file.exists()
+
+    def drop_cache():
+        if cache_file is not None:
+            cache_file.unlink(missing_ok=True)
+
+    if warm:
+        prepare_data(data_path)
+        times = _repeat(lambda: prepare_data(data_path), repeats)
+    else:
+        times = _repeat(lambda: prepare_data(data_path), repeats, setup=drop_cache)
+
+    # Não deixa no cache do projeto entradas de bases temporárias do benchmark
+    if not existed:
+        drop_cache()
+    return summarize(times, n_rows)
+
+
+def _case_prepare_data_cold(data_path, repeats):
+    return _case_prepare_data(data_path, repeats, warm=False)
+
+
+def _case_prepare_data_warm(data_path, repeats):
+    return _case_prepare_data(data_path, repeats, warm=True)
+
+
+def _case_train(data_path, repeats, work_dir):
+    from train import train_and_save_model
+
+    n_rows = _count_rows(data_path)
+    save_path = Path(work_dir) / "bench_model.joblib"
+    times = _repeat(lambda: train_and_save_model(data_path, save_path, artifact_dir=None), repeats)
+    return summarize(times, n_rows)
+
+
+def _case_model_load(model_path, repeats):
+    from startup import load_model
+
+    return summarize(_repeat(lambda: load_model(model_path), repeats))
+
+
+def _case_predict(model_path, data_path, batch_size, repeats):
+    import pandas as pd
+    from startup import load_model
+    from preprocessing import preprocess_dataframe
+
+    model = load_model(model_path)
+    source = pd.read_csv(data_path).drop(columns=["HeartDisease"])
+    rng = np.random.default_rng(0)
+    batch = source.iloc[rng.integers(0, len(source), batch_size)].reset_index(drop=True)
+
+    # Aquecimento fora da medição
+    model.predict_proba(preprocess_dataframe(batch))
+    times = _repeat(lambda: model.predict_proba(preprocess_dataframe(batch)), repeats, min_time=0.5)
+    return summarize(times, batch_size)
+
+
+CASES = {
+    "prepare_data_cold": _case_prepare_data_cold,
+    "prepare_data_warm": _case_prepare_data_warm,
+    "train": _case_train,
+    "model_load": _case_model_load,
+    "predict_proba": _case_predict
+}
+
+
+def _run_case(name, args):
+    # Roda no processo filho: os imports pesados acontecem aqui dentro
+    start = time.perf_counter()
+    result = CASES[name](*args)
+    result["wall_s"] = time.perf_counter() - start
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_case(name, params: dict, args) -> dict:
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+        result = executor.submit(_run_case, name, args).result()
+    return {"name": name, "params": params, **result}
+
+
+# 4) Suíte completa
+
+def run_suite(
+    data_path: str = DEFAULT_DATA_PATH,
+    model_path: str = "../Model/model.joblib",
+    sizes=DEFAULT_SIZES,
+    batch_sizes=DEFAULT_BATCH_SIZES,
+    repeats: int = 5,
+    train_repeats: int = 1
+) -> dict:
+    results = []
+
+    def record(name, params, args):
+        result = run_case(name, params, args)
+        results.append(result)
+        extra = f" | {result['rows_per_s']:,.0f} linhas/s" if "rows_per_s" in result else ""
+        rss = f" | RSS {result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else ""
+        print(f"{name:<18} {json.dumps(params):<28} p50 {result['p50_ms']:10.2f} ms{extra}{rss}", flush=True)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for n_rows in sizes:
+            path = make_dataset(data_path, n_rows, work_dir)
+            record("prepare_data_cold", {"rows": n_rows}, (path, repeats))
+            record("prepare_data_warm", {"rows": n_rows}, (path, repeats))
+            record("train", {"rows": n_rows}, (path, train_repeats, work_dir))
+
+        record("model_load", {}, (model_path, repeats))
+
+        for batch_size in batch_sizes:
+            record("predict_proba", {"batch_size": batch_size}, (model_path, data_path, batch_size, repeats))
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+
+# 5) Comparação com baseline
+
+def _case_id(result) -> str:
+    return f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, metric: str = "p50_ms"):
+
+    # Regressão = caso tolerance (ex.: 20%) mais lento que o baseline na mediana.
+
+    base = {_case_id(r): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        ref = base.get(_case_id(result))
+        if ref is None:
+            continue
+        ratio = result[metric] / ref[metric] if ref[metric] > 0 else float("inf")
+        rows.append({
+            "case": _case_id(result),
+            "baseline_ms": ref[metric],
+            "current_ms": result[metric],
+            "ratio": ratio,
+            "regression": ratio > 1.0 + tolerance
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de treino e inferência.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--model", default="../Model/model.joblib", help="model.joblib ou diretório de artefato")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="Tamanhos reduzidos (para CI)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    batch_sizes = args.batch_sizes or (QUICK_BATCH_SIZES if args.quick else DEFAULT_BATCH_SIZES)
+
+    report = run_suite(args.data, args.model, sizes, batch_sizes, args.repeats)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados salvos em: {Path(args.output).resolve()}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(report, baseline, args.tolerance)
+        for row in rows:
+            flag = "REGRESSÃO" if row["regression"] else "ok"
+            print(f"{flag:<10} {row['case']:<45} {row['baseline_ms']:10.2f} -> {row['current_ms']:10.2f} ms ({row['ratio']:.2f}x)")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# compaction.py
+# Responsável por:
+# - Procurar um modelo menor que o treinado (200 árvores de profundidade 5) que
+#   mantenha AUC, recall e log-loss numa validação separada do treino dentro de tolerâncias
+# - Gerar candidatos de três formas, sempre com o MESMO pré-processador ajustado:
+#   * as primeiras k árvores do modelo original (fatias do booster, sem retreino)
+#   * retreinos mais rasos (max_depth menor), também avaliados nas primeiras k árvores
+#   * retreinos sem as features de menor contribuição média (|SHAP|, explanations.py)
+# - Medir, para cada candidato, AUC/recall, log-loss e a latência do modelo (1 linha e lote)
+# - Escolher o menor (nº de nós) dentro da tolerância, retreiná-lo no treino completo,
+#   medir só o original e o escolhido no teste e salvar, ao lado do model.joblib,
+#   o pipeline compactado e a tabela latência x métricas
+
+# Obs.: a latência medida é só a do classificador sobre a matriz já transformada;
+# o pré-processamento é o mesmo para todos os candidatos e não muda com a compactação.
+
+# Features "removidas" saem das árvores, não da entrada: o retreino as recebe como
+# ausentes (NaN), então nenhuma árvore as usa, mas o pipeline continua aceitando as
+# 11 features (validação, servidor, artefato e cache não mudam).
+
+# O log-loss entra na tolerância porque as faixas de risco (30%/70%, scoring.py) usam
+# a probabilidade: as primeiras k árvores com learning_rate 0.05 ordenam bem os
+# pacientes (AUC quase igual), mas comprimem as probabilidades em torno de 0,5.
+
+# A escolha usa uma validação estratificada separada do treino do train.py
+# (VALIDATION_FRACTION), nunca o teste: escolher no teste e reportar o mesmo teste
+# daria números otimistas. Todas as famílias, inclusive a configuração original, são
+# retreinadas na parte restante para a comparação ser justa (o model.joblib já viu
+# a validação). O teste (prepare_data, ~184 linhas) só mede o original e o escolhido.
+# Com tão poucas linhas, diferenças de AUC menores que a tolerância são ruído, por
+# isso o padrão não exige que o candidato seja tão bom quanto o original, só que não
+# piore além dela.
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.metrics import log_loss, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from explanations import explain_batch
+from fast_preprocess import CompiledPreprocessor
+from preprocessing import prepare_data
+from scoring import DEFAULT_THRESHOLD
+
+
+DEFAULT_MODEL_PATH = "../Model/model.joblib"
+DEFAULT_DATA_PATH = "../Data/heart.csv"
+COMPACT_MODEL_FILE = "model_compact.joblib"
+TRADEOFF_FILE = "compaction.json"
+
+DEFAULT_AUC_TOLERANCE = 0.005
+DEFAULT_RECALL_TOLERANCE = 0.02
+DEFAULT_LOG_LOSS_TOLERANCE = 0.02
+DEFAULT_TREE_COUNTS = (10, 25, 50, 75, 100, 150)
+DEFAULT_DEPTHS = (2, 3, 4)
+DEFAULT_DROP_COUNTS = (1, 2, 3)
+VALIDATION_FRACTION = 0.25
+LATENCY_BATCH_ROWS = 1000
+
+
+# 1) Candidatos
+
+def tree_nodes(booster) -> int:
+
+    # Nº total de nós (uma linha por nó no dump texto): a medida de "tamanho" do modelo.
+
+    return sum(tree.count("\n") for tree in booster.get_dump())
+
+
+def _classifier_from_booster(params: dict, booster, n_trees: int) -> XGBClassifier:
+
+    # XGBClassifier com as primeiras n_trees árvores do booster (fatia, sem retreino).
+
+    classifier = XGBClassifier(**{**params, "n_estimators": n_trees})
+    classifier.load_model(bytearray(booster[:n_trees].save_raw("ubj")))
+    return classifier
+
+
+def feature_ranking(pipeline, X_train) -> list:
+
+    # Features originais da menor para a maior contribuição média |SHAP| no treino.
+
+    contributions = explain_batch(pipeline, X_train).drop(columns="base_value")
+    return contributions.abs().mean().sort_values().index.tolist()
+
+
+def _mask_features(X: np.ndarray, layout: CompiledPreprocessor, features) -> np.ndarray:
+
+    # Cópia de X com as colunas transformadas dessas features como ausentes (NaN).
+
+    starts = list(range(len(layout.num_features))) + list(layout.cat_offsets)
+    bounds = dict(zip(layout.feature_order, zip(starts, starts[1:] + [layout.n_outputs])))
+    X = np.array(X, dtype=np.float32)
+    for feature in features:
+        start, end = bounds[feature]
+        X[:, start:end] = np.nan
+    return X
+
+
+def _fit_booster(params: dict, config: dict, X_transformed, y, layout: CompiledPreprocessor):
+
+    # Treina a configuração (profundidade + features removidas) e devolve o booster.
+
+    if config["dropped"]:
+        X_transformed = _mask_features(X_transformed, layout, config["dropped"])
+    model = XGBClassifier(**{**params, "max_depth": config["max_depth"]})
+    model.fit(X_transformed, y)
+    return model.get_booster()
+
+
+def _families(params: dict, ranking: list, depths, drop_counts):
+
+    # Configurações a retreinar: a original e cada variação; cada booster treinado
+    # vira depois vários candidatos (as primeiras k árvores).
+
+    yield {"family": "original", "max_depth": params["max_depth"], "dropped": []}
+
+    for depth in depths:
+        if params["max_depth"] is not None and depth >= params["max_depth"]:
+            continue
+        yield {"family": f"depth_{depth}", "max_depth": depth, "dropped": []}
+
+    for n_drop in drop_counts:
+        yield {"family": f"drop_{n_drop}", "max_depth": params["max_depth"], "dropped": ranking[:n_drop]}
+
+
+# 2) Medição
+
+def _median_ms(fn, repeats: int) -> float:
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return 1000.0 * float(np.median(times))
+
+
+def measure(classifier, X_test, y_test, threshold: float = DEFAULT_THRESHOLD, repeats: int = 200) -> dict:
+
+    # Métricas em (X, y) + latência mediana (1 linha e lote de LATENCY_BATCH_ROWS).
+
+    proba = classifier.predict_proba(X_test)[:, 1]
+    one_row = X_test[:1]
+    batch = np.resize(X_test, (LATENCY_BATCH_ROWS, X_test.shape[1]))
+    return {
+        "roc_auc": float(roc_auc_score(y_test, proba)),
+        "recall": float(recall_score(y_test, (proba >= threshold).astype(int))),
+        "log_loss": float(log_loss(y_test, proba)),
+        "single_row_ms": _median_ms(lambda: classifier.predict_proba(one_row), repeats),
+        "batch_ms": _median_ms(lambda: classifier.predict_proba(batch), max(10, repeats // 10))
+    }
+
+
+# 3) Busca
+
+def compact_model(
+    model_path: str = DEFAULT_MODEL_PATH,
+    data_path: str = DEFAULT_DATA_PATH,
+    auc_tolerance: float = DEFAULT_AUC_TOLERANCE,
+    recall_tolerance: float = DEFAULT_RECALL_TOLERANCE,
+    log_loss_tolerance: float = DEFAULT_LOG_LOSS_TOLERANCE,
+    latency_budget_ms: float = None,
+    tree_counts=DEFAULT_TREE_COUNTS,
+    depths=DEFAULT_DEPTHS,
+    drop_counts=DEFAULT_DROP_COUNTS,
+    threshold: float = DEFAULT_THRESHOLD,
+    save: bool = True
+) -> dict:
+    """
+    Avalia os candidatos compactados do pipeline em model_path numa validação
+    separada do treino e escolhe o de menos nós cujo AUC e recall (no limiar
+    threshold) não caiam, nem o log-loss suba, mais que as tolerâncias em relação à
+    configuração original, e cuja latência de 1 linha caiba em latency_budget_ms (se
+    informado). O escolhido é retreinado no treino completo; só ele e o original são
+    medidos no teste. Com save=True, grava model_compact.joblib e compaction.json na
+    pasta do modelo. Retorna dict com baseline, selected, a tabela de candidatos
+    (validação) e as métricas de teste.
+    """
+
+    pipeline = joblib.load(model_path)
+    preprocess = pipeline.named_steps["preprocess"]
+    original = pipeline.named_steps["model"]
+    params = original.get_params()
+    layout = CompiledPreprocessor.from_pipeline(pipeline)
+
+    # Mesmo split do train.py; a validação sai do treino, o teste fica para o final.
+    # O pré-processador já está ajustado no treino e não muda.
+    X_train, X_test, y_train, y_test, _ = prepare_data(data_path)
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train,
+        test_size=VALIDATION_FRACTION,
+        stratify=y_train,
+        random_state=params.get("random_state") or 42
+    )
+    X_fit_transformed = np.asarray(preprocess.transform(X_fit), dtype=np.float32)
+    X_val_transformed = np.ascontiguousarray(preprocess.transform(X_val), dtype=np.float32)
+
+    candidates = []
+    baseline = None
+    for config in _families(params, feature_ranking(pipeline, X_fit), depths, drop_counts):
+        booster = _fit_booster(params, config, X_fit_transformed, y_fit, layout)
+        n_total = booster.num_boosted_rounds()
+        for n_trees in sorted({k for k in tree_counts if k < n_total} | {n_total}):
+            classifier = _classifier_from_booster({**params, "max_depth": config["max_depth"]}, booster, n_trees)
+            candidates.append({
+                "name": f"{config['family']}@{n_trees}",
+                **config,
+                "n_trees": n_trees,
+                "nodes": tree_nodes(classifier.get_booster()),
+                **measure(classifier, X_val_transformed, y_val, threshold)
+            })
+            if baseline is None and n_trees == n_total:
+                baseline = candidates[-1]
+
+    for candidate in candidates:
+        candidate["eligible"] = bool(
+            candidate["roc_auc"] >= baseline["roc_auc"] - auc_tolerance
+            and candidate["recall"] >= baseline["recall"] - recall_tolerance
+            and candidate["log_loss"] <= baseline["log_loss"] + log_loss_tolerance
+            and (latency_budget_ms is None or candidate["single_row_ms"] <= latency_budget_ms)
+        )
+
+    eligible = [c for c in candidates if c["eligible"]]
+    # Nenhum dentro do orçamento de latência: fica o original (e within_budget=False)
+    selected = min(eligible, key=lambda c: (c["nodes"], c["single_row_ms"])) if eligible else baseline
+
+    # Modelo final: a configuração original já foi treinada no treino completo
+    # (model.joblib); as demais são retreinadas nele
+    if selected["family"] == "original":
+        final_booster = original.get_booster()
+    else:
+        X_train_transformed = np.asarray(preprocess.transform(X_train), dtype=np.float32)
+        final_booster = _fit_booster(params, selected, X_train_transformed, y_train, layout)
+    final = _classifier_from_booster({**params, "max_depth": selected["max_depth"]}, final_booster, selected["n_trees"])
+
+    X_test_transformed = np.ascontiguousarray(preprocess.transform(X_test), dtype=np.float32)
+    test_metrics = {
+        "baseline": measure(original, X_test_transformed, y_test, threshold),
+        "selected": measure(final, X_test_transformed, y_test, threshold)
+    }
+
+    result = {
+        "model_path": str(model_path),
+        "tolerances": {
+            "roc_auc": auc_tolerance,
+            "recall": recall_tolerance,
+            "log_loss": log_loss_tolerance,
+            "single_row_ms": latency_budget_ms
+        },
+        "threshold": threshold,
+        "baseline": baseline["name"],
+        "selected": selected["name"],
+        "within_budget": bool(eligible),
+        "validation_rows": int(len(X_val)),
+        "candidates": candidates,
+        "test": test_metrics
+    }
+
+    if save:
+        directory = Path(model_path).parent
+        compact = Pipeline(steps=[("preprocess", preprocess), ("model", final)])
+        joblib.dump(compact, directory / COMPACT_MODEL_FILE)
+        with open(directory / TRADEOFF_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    return result
+
+
+def format_table(result: dict) -> str:
+
+    # Tabela de texto (um candidato por linha, métricas de validação), marcando o
+    # original e o escolhido; no fim, os dois medidos no teste.
+
+    header = f"{'candidato':<16}{'nós':>7}{'AUC':>8}{'recall':>8}{'logloss':>9}{'1 linha ms':>12}{'lote ms':>10}"
+    lines = [header, "-" * len(header)]
+    for c in result["candidates"]:
+        mark = " <- original" if c["name"] == result["baseline"] else ""
+        mark += " <- escolhido" if c["name"] == result["selected"] else ""
+        mark += "" if c["eligible"] else " (fora)"
+        lines.append(
+            f"{c['name']:<16}{c['nodes']:>7}{c['roc_auc']:>8.4f}{c['recall']:>8.4f}{c['log_loss']:>9.4f}"
+            f"{c['single_row_ms']:>12.3f}{c['batch_ms']:>10.2f}{mark}"
+        )
+    lines.append("")
+    lines.append("Teste:")
+    for key in ("baseline", "selected"):
+        c = result["test"][key]
+        name = result[key]
+        lines.append(
+            f"{name:<16}{'':>7}{c['roc_auc']:>8.4f}{c['recall']:>8.4f}{c['log_loss']:>9.4f}"
+            f"{c['single_row_ms']:>12.3f}{c['batch_ms']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compactação do modelo com orçamento de latência.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Pipeline treinado (model.joblib)")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="Dataset bruto (mesmo split do train.py)")
+    parser.add_argument("--auc-tolerance", type=float, default=DEFAULT_AUC_TOLERANCE)
+    parser.add_argument("--recall-tolerance", type=float, default=DEFAULT_RECALL_TOLERANCE)
+    parser.add_argument("--log-loss-tolerance", type=float, default=DEFAULT_LOG_LOSS_TOLERANCE)
+    parser.add_argument("--latency-budget-ms", type=float, default=None, help="Latência máxima de 1 linha (modelo)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Limiar do recall")
+    args = parser.parse_args(argv)
+
+    result = compact_model(
+        args.model, args.data, args.auc_tolerance, args.recall_tolerance, args.log_loss_tolerance,
+        args.latency_budget_ms,
+        threshold=args.threshold
+    )
+    print(format_table(result))
+    if not result["within_budget"]:
+        print("Nenhum candidato dentro das tolerâncias/orçamento; mantido o modelo original.")
+    print(f"Escolhido: {result['selected']} -> {Path(args.model).parent / COMPACT_MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    main()
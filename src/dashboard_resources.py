@@ -0,0 +1,44 @@
+# dashboard_resources.py
+# Responsável por:
+# - Guardar os recursos do dashboard que são compartilhados entre páginas e sessões
+#   (st.cache_resource): a carga do modelo em segundo plano e o cache de predições
+# - Localizar o arquivo do modelo (LIGIA_MODEL_PATH ou caminhos conhecidos)
+
+# Obs.: o st.cache_resource identifica a função pelo módulo onde ela foi definida.
+# Definidas aqui e importadas pelo Inference.py e pelas páginas em pages/, todas
+# recebem o MESMO pipeline: uma cópia por servidor, não uma por página ou usuário.
+
+import os
+
+import streamlit as st
+
+from startup import BackgroundModelLoader, model_path_from_env
+
+
+# Localizar o arquivo do modelo
+def find_model_path():
+    alternative_paths = [
+        os.path.join("Model", "model.joblib"),
+        os.path.join("..", "Model", "model.joblib"),
+        os.path.join(os.path.dirname(__file__), "..", "Model", "model.joblib"),
+        "model.joblib"
+    ]
+
+    # Busca o arquivo nos caminhos da lista
+    for path in alternative_paths:
+        if os.path.exists(path):
+            return path
+    return None
+
+# Inicia a carga + aquecimento do modelo em segundo plano (uma vez por servidor)
+@st.cache_resource
+def start_model_loader():
+    # LIGIA_MODEL_PATH tem prioridade (aceita model.joblib ou diretório de artefato)
+    model_path = model_path_from_env() or find_model_path()
+    return BackgroundModelLoader(model_path).start()
+
+# Cache de predições compartilhado entre sessões (o underscore evita o hash do modelo)
+@st.cache_resource
+def load_prediction_cache(_model, model_path):
+    from prediction_cache import PredictionCache
+    return PredictionCache(model_path, model=_model)
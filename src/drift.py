@@ -0,0 +1,404 @@
+# drift.py
+# Responsável por:
+# - Resumir a distribuição de cada feature em "sketches" de memória constante:
+#     numéricas   -> histograma de bins fixos (bordas = quantis do treino) + ausentes
+#     categóricas -> contagem por categoria do treino + "outras" + ausentes
+# - Salvar um perfil de referência no treino (train_and_save_model -> drift_reference.json)
+# - Comparar a produção com a referência em janelas deslizantes (PSI e KS por feature)
+
+# Obs.: os sketches só somam contagens, então são mescláveis: cada processo (workers
+# do batch_score, réplicas do server) mantém o seu e o merge é uma soma de arrays.
+# Atualizar custa um searchsorted/bincount (numéricas) ou um Counter (categóricas)
+# por coluna, ~1 µs por linha com o buffer do DriftMonitor, e a memória não cresce
+# com o volume: janela = n_buckets x (bins + 2) contadores por feature.
+
+# Leitura do PSI (convenção usual): < 0,1 estável | 0,1-0,25 atenção | > 0,25 drift
+
+# Variáveis de ambiente (server.py):
+# - LIGIA_DRIFT=1              liga o monitor (relatório em GET /drift)
+# - LIGIA_DRIFT_WINDOW=10000   linhas da janela deslizante
+
+import argparse
+import json
+import logging
+import os
+import threading
+from collections import Counter, deque
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import INVALID_ZERO_FEATURES, get_feature_groups
+from startup import env_flag
+
+
+logger = logging.getLogger("ligia.drift")
+
+REFERENCE_FILE = "drift_reference.json"
+DEFAULT_BINS = 10
+PSI_WARNING = 0.10
+PSI_ALERT = 0.25
+
+DEFAULT_WINDOW_ROWS = 10_000
+DEFAULT_BUCKETS = 10
+
+# Evita log(0) no PSI quando um bin fica vazio
+_EPS = 1e-4
+
+
+# 1) Sketches por feature
+
+class NumericSketch:
+
+    # counts[i] = valores no bin i (np.searchsorted nas bordas); mais 1 contador de ausentes.
+
+    def __init__(self, edges, counts=None, missing: int = 0, zero_as_missing: bool = False):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.missing = int(missing)
+        self.zero_as_missing = zero_as_missing
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        if self.zero_as_missing:
+            # Mesmo critério do preprocess_dataframe (zero = não medido)
+            missing |= values == 0
+        present = values[~missing]
+        self.counts += np.bincount(np.searchsorted(self.edges, present, side="right"), minlength=len(self.counts))
+        self.missing += int(missing.sum())
+
+    def merge(self, other: "NumericSketch"):
+        self.counts += other.counts
+        self.missing += other.missing
+        return self
+
+    def empty_copy(self) -> "NumericSketch":
+        return NumericSketch(self.edges, zero_as_missing=self.zero_as_missing)
+
+    def frequencies(self) -> np.ndarray:
+        return np.append(self.counts, self.missing)
+
+    def to_dict(self) -> dict:
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist(), "missing": self.missing}
+
+
+class CategoricalSketch:
+
+    # counts[i] = categoria i do treino; depois "outras" (desconhecidas) e ausentes.
+
+    def __init__(self, categories, counts=None, other: int = 0, missing: int = 0):
+        self.categories = list(categories)
+        self._positions = {c: i for i, c in enumerate(self.categories)}
+        self.counts = np.zeros(len(self.categories), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        self.other = int(other)
+        self.missing = int(missing)
+
+    def update(self, values):
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            # Coluna category (ingest.py): conta pelos códigos e traduz só o vocabulário
+            tally = np.bincount(values.cat.codes.to_numpy() + 1, minlength=len(values.cat.categories) + 1)
+            self.missing += int(tally[0])
+            tally = dict(zip(values.cat.categories.tolist(), tally[1:].tolist()))
+        else:
+            # Counter em Python puro: em micro-lotes sai mais barato que qualquer
+            # operação vetorizada (que paga o custo fixo por chamada do NumPy/pandas)
+            tally = Counter(values.tolist() if hasattr(values, "tolist") else values)
+
+        for value, n in tally.items():
+            position = self._positions.get(value)
+            if position is not None:
+                self.counts[position] += n
+            elif pd.isna(value):
+                self.missing += n
+            else:
+                self.other += n
+
+    def merge(self, other: "CategoricalSketch"):
+        self.counts += other.counts
+        self.other += other.other
+        self.missing += other.missing
+        return self
+
+    def empty_copy(self) -> "CategoricalSketch":
+        return CategoricalSketch(self.categories)
+
+    def frequencies(self) -> np.ndarray:
+        return np.append(self.counts, [self.other, self.missing])
+
+    def to_dict(self) -> dict:
+        return {
+            "categories": [c.item() if hasattr(c, "item") else c for c in self.categories],
+            "counts": self.counts.tolist(),
+            "other": self.other,
+            "missing": self.missing
+        }
+
+
+def _float_values(column: pd.Series) -> np.ndarray:
+
+    # Colunas NumPy (int/float) convertem direto; na_value só é preciso nas nullable
+    # (Float32, Int64, object com None), e custa ~4x mais em lotes pequenos.
+
+    values = column.to_numpy()
+    if values.dtype.kind in "iuf":
+        return values.astype(np.float64, copy=False)
+    return column.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class DriftSketch:
+
+    # Um sketch por feature de get_feature_groups(); mesclável e serializável.
+
+    def __init__(self, numeric: dict, categorical: dict, n_rows: int = 0):
+        self.numeric = numeric
+        self.categorical = categorical
+        self.n_rows = int(n_rows)
+
+    def update(self, df: pd.DataFrame):
+        for f, sketch in self.numeric.items():
+            sketch.update(_float_values(df[f]))
+        for f, sketch in self.categorical.items():
+            sketch.update(df[f])
+        self.n_rows += len(df)
+        return self
+
+    def update_records(self, records):
+
+        # Mesmo resultado de update(pd.DataFrame(records)), sem montar o DataFrame:
+        # o server já tem os pacientes como dicts e o acesso por coluna do pandas
+        # custaria mais que o próprio sketch. None/NaN contam como ausentes.
+
+        for f, sketch in self.numeric.items():
+            sketch.update(np.array([r.get(f) for r in records], dtype=np.float64))
+        for f, sketch in self.categorical.items():
+            sketch.update([r.get(f) for r in records])
+        self.n_rows += len(records)
+        return self
+
+    def merge(self, other: "DriftSketch"):
+        for f, sketch in self.numeric.items():
+            sketch.merge(other.numeric[f])
+        for f, sketch in self.categorical.items():
+            sketch.merge(other.categorical[f])
+        self.n_rows += other.n_rows
+        return self
+
+    def empty_copy(self) -> "DriftSketch":
+        return DriftSketch(
+            {f: s.empty_copy() for f, s in self.numeric.items()},
+            {f: s.empty_copy() for f, s in self.categorical.items()}
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "n_rows": self.n_rows,
+            "numeric": {f: s.to_dict() for f, s in self.numeric.items()},
+            "categorical": {f: s.to_dict() for f, s in self.categorical.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DriftSketch":
+        numeric = {
+            f: NumericSketch(d["edges"], d["counts"], d["missing"], zero_as_missing=f in INVALID_ZERO_FEATURES)
+            for f, d in data["numeric"].items()
+        }
+        categorical = {
+            f: CategoricalSketch(d["categories"], d["counts"], d["other"], d["missing"])
+            for f, d in data["categorical"].items()
+        }
+        return cls(numeric, categorical, data["n_rows"])
+
+
+# 2) Perfil de referência (treino)
+
+def build_reference(X_train: pd.DataFrame, bins: int = DEFAULT_BINS) -> DriftSketch:
+
+    # Bordas = quantis internos do treino (bins ~equiprováveis); categorias = as vistas no treino.
+
+    num_features, cat_features = get_feature_groups()
+    numeric = {}
+    for f in num_features:
+        values = X_train[f].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = values[~np.isnan(values)]
+        if f in INVALID_ZERO_FEATURES:
+            valid = valid[valid != 0]
+        edges = np.unique(np.quantile(valid, np.linspace(0, 1, bins + 1)[1:-1]))
+        numeric[f] = NumericSketch(edges, zero_as_missing=f in INVALID_ZERO_FEATURES)
+
+    categorical = {}
+    for f in cat_features:
+        observed = pd.Series(X_train[f]).dropna().unique()
+        categorical[f] = CategoricalSketch(sorted(c.item() if hasattr(c, "item") else c for c in observed))
+
+    return DriftSketch(numeric, categorical).update(X_train)
+
+
+def reference_from_data(data_path, bins: int = DEFAULT_BINS) -> DriftSketch:
+
+    # Refaz o split de treino (mesmo random_state de split_data) a partir dos dados
+    # brutos: usado pela linha de comando deste módulo, para um dataset já treinado.
+
+    from preprocessing import load_data, preprocess_dataframe, split_data
+
+    X_train = split_data(preprocess_dataframe(load_data(data_path)))[0]
+    return build_reference(X_train, bins)
+
+
+def save_reference(reference: DriftSketch, path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(reference.to_dict(), f, indent=2)
+    return path
+
+
+def load_reference(path) -> DriftSketch:
+    with open(path, encoding="utf-8") as f:
+        return DriftSketch.from_dict(json.load(f))
+
+
+def reference_path_for(model_path) -> Path:
+
+    # Diretório de artefato -> dentro dele; model.joblib -> na mesma pasta.
+
+    model_path = Path(model_path)
+    return (model_path if model_path.is_dir() else model_path.parent) / REFERENCE_FILE
+
+
+# 3) Comparação
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    p = np.maximum(expected / max(expected.sum(), 1), _EPS)
+    q = np.maximum(actual / max(actual.sum(), 1), _EPS)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+
+    # KS sobre os bins (sem ausentes): maior distância entre as CDFs acumuladas.
+
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    return float(np.max(np.abs(np.cumsum(expected) / expected.sum() - np.cumsum(actual) / actual.sum())))
+
+
+def _status(value: float) -> str:
+    if value >= PSI_ALERT:
+        return "drift"
+    if value >= PSI_WARNING:
+        return "atencao"
+    return "estavel"
+
+
+def compare(reference: DriftSketch, current: DriftSketch) -> dict:
+    features = {}
+    for f, ref in reference.numeric.items():
+        cur = current.numeric[f]
+        value = psi(ref.frequencies(), cur.frequencies())
+        features[f] = {"psi": value, "ks": binned_ks(ref.counts, cur.counts), "status": _status(value)}
+    for f, ref in reference.categorical.items():
+        value = psi(ref.frequencies(), current.categorical[f].frequencies())
+        features[f] = {"psi": value, "status": _status(value)}
+
+    worst = max(features.values(), key=lambda r: r["psi"])
+    return {
+        "rows": current.n_rows,
+        "max_psi": worst["psi"],
+        "status": worst["status"],
+        "features": features
+    }
+
+
+# 4) Monitor com janela deslizante
+
+class DriftMonitor:
+
+    # A janela é formada pelos últimos n_buckets blocos de ~bucket_rows linhas.
+    # Ao encher um bloco, o mais antigo sai (deque com maxlen): memória constante.
+
+    # Micro-lotes do server têm poucas linhas e o custo de um update é quase todo
+    # fixo (~100 µs), então update_records só guarda os dicts e o sketch é atualizado
+    # de uma vez a cada flush_rows linhas (~1 µs/linha).
+
+    def __init__(
+        self, reference: DriftSketch, bucket_rows: int = 1000, n_buckets: int = DEFAULT_BUCKETS,
+        flush_rows: int = 256
+    ):
+        self.reference = reference
+        self.bucket_rows = bucket_rows
+        self.flush_rows = flush_rows
+        self._buckets = deque(maxlen=n_buckets - 1)
+        self._current = reference.empty_copy()
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def update(self, df: pd.DataFrame):
+        with self._lock:
+            self._current.update(df)
+            self._rotate()
+
+    def update_records(self, records):
+        with self._lock:
+            self._pending.extend(records)
+            if len(self._pending) >= self.flush_rows:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._current.update_records(self._pending)
+            self._pending = []
+            self._rotate()
+
+    def _rotate(self):
+        if self._current.n_rows >= self.bucket_rows:
+            self._buckets.append(self._current)
+            self._current = self.reference.empty_copy()
+
+    def window(self) -> DriftSketch:
+        with self._lock:
+            self._flush()
+            merged = self.reference.empty_copy().merge(self._current)
+            for bucket in self._buckets:
+                merged.merge(bucket)
+        return merged
+
+    def report(self) -> dict:
+        return compare(self.reference, self.window())
+
+
+def monitor_from_env(model_path):
+
+    # DriftMonitor se LIGIA_DRIFT=1 e houver drift_reference.json junto do modelo;
+    # senão None (com aviso no log quando o perfil está faltando).
+
+    if not env_flag("LIGIA_DRIFT"):
+        return None
+
+    path = reference_path_for(model_path)
+    if not path.exists():
+        logger.warning(f"LIGIA_DRIFT=1, mas {path} não existe (gere com: python drift.py)")
+        return None
+
+    window_rows = int(os.environ.get("LIGIA_DRIFT_WINDOW", DEFAULT_WINDOW_ROWS))
+    return DriftMonitor(load_reference(path), max(window_rows // DEFAULT_BUCKETS, 1), DEFAULT_BUCKETS)
+
+
+def main(argv=None):
+
+    # Gera o drift_reference.json de um modelo já treinado (as mesmas linhas de
+    # treino do split de train.py), sem treinar de novo.
+
+    parser = argparse.ArgumentParser(description="Perfil de referência para monitoramento de drift.")
+    parser.add_argument("--data", default="../Data/heart.csv")
+    parser.add_argument("--output", default=f"../Model/{REFERENCE_FILE}")
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    args = parser.parse_args(argv)
+
+    path = save_reference(reference_from_data(args.data, args.bins), args.output)
+    print(f"Referência salva em: {path.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# explanations.py
+# Responsável por:
+# - Explicar as predições: contribuição de cada feature (TreeSHAP nativo do XGBoost,
+#   predict(pred_contribs=True)) calculada para o lote inteiro numa única chamada
+# - Somar as colunas do one-hot de volta às 11 features originais (get_feature_groups)
+# - Funcionar com o pipeline joblib e com o diretório de artefato (ArtifactScorer)
+
+# Obs.: as contribuições estão na escala de log-odds. Para cada paciente,
+# base_value + soma das contribuições = logit(probabilidade), então o gráfico mostra
+# quanto cada feature empurrou o risco para cima (positivo) ou para baixo (negativo).
+
+# Custo (200 árvores de profundidade 5, 1 núcleo):
+# - exato (TreeSHAP, padrão): ~0,7 ms por linha; ~3 ms para um paciente do dashboard
+# - approximate=True (atribuição por caminho, approx_contribs): ~1 passada de predição
+#   a mais para o lote inteiro; a soma continua exata, a divisão entre features não.
+#   Indicado para lotes grandes (uploads com milhares de pacientes).
+
+import numpy as np
+import pandas as pd
+
+from fast_preprocess import CompiledPreprocessor
+from preprocessing import get_feature_groups, preprocess_dataframe
+
+
+BASE_VALUE = "base_value"
+
+
+def _model_parts(model):
+
+    # (transformação das features, booster, layout das colunas de saída)
+
+    if hasattr(model, "named_steps"):
+        preprocess = model.named_steps["preprocess"]
+        booster = model.named_steps["model"].get_booster()
+        return preprocess.transform, booster, CompiledPreprocessor.from_pipeline(model)
+    if not hasattr(model.booster, "save_raw"):
+        raise ValueError("Explicações exigem o booster do XGBoost (LIGIA_TREE_BACKEND=xgboost)")
+    return model.transform, model.booster, model.preprocessor
+
+
+def _group_starts(layout: CompiledPreprocessor) -> np.ndarray:
+
+    # Início de cada feature original nas colunas transformadas: uma coluna por
+    # numérica, um bloco contíguo (as categorias do one-hot) por categórica.
+
+    return np.asarray(list(range(len(layout.num_features))) + list(layout.cat_offsets))
+
+
+def explain_batch(model, df: pd.DataFrame, approximate: bool = False) -> pd.DataFrame:
+    """
+    Contribuições por feature para um lote de pacientes (DataFrame bruto com as
+    11 features). Retorna um DataFrame alinhado ao índice da entrada, com uma coluna
+    por feature (ordem de get_feature_groups) e a coluna base_value.
+    approximate=True troca o TreeSHAP exato pela aproximação rápida do XGBoost.
+    """
+
+    import xgboost as xgb
+
+    transform, booster, layout = _model_parts(model)
+    X = transform(preprocess_dataframe(df))
+
+    # Última coluna do pred_contribs = viés (valor esperado da margem)
+    contribs = booster.predict(
+        xgb.DMatrix(X, missing=np.nan), pred_contribs=True, approx_contribs=approximate
+    )
+    per_feature = np.add.reduceat(contribs[:, :-1], _group_starts(layout), axis=1)
+
+    num_features, cat_features = get_feature_groups()
+    result = pd.DataFrame(per_feature, columns=layout.num_features + layout.cat_features, index=df.index)
+    result = result[num_features + cat_features]
+    result[BASE_VALUE] = contribs[:, -1]
+    return result
+
+
+def probability_from_contributions(contributions: pd.DataFrame) -> np.ndarray:
+
+    # sigmoid(base_value + soma das contribuições): confere com o predict_proba.
+
+    margin = contributions.to_numpy(dtype=np.float64).sum(axis=1)
+    return 1.0 / (1.0 + np.exp(-margin))
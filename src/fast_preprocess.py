@@ -0,0 +1,243 @@
+# fast_preprocess.py
+# Responsável por:
+# - "Compilar" o ColumnTransformer já ajustado (build_preprocessor) em arrays simples:
+#   medianas, médias/escalas e tabelas categoria -> coluna do one-hot
+# - Preencher uma matriz float32 pré-alocada direto de dicts ou colunas NumPy,
+#   sem construir DataFrame e sem passar pelo sklearn a cada chamada
+
+# Obs.: as operações são as mesmas do sklearn, na mesma ordem e em float64
+# (imputação -> (x - média) / escala), então o resultado é idêntico bit a bit ao
+# ColumnTransformer. A conversão para float32 só acontece ao gravar na matriz de
+# saída, exatamente como o XGBoost faz internamente com a saída do sklearn.
+
+import math
+
+import numpy as np
+
+from preprocessing import INVALID_ZERO_FEATURES
+
+
+def _is_missing(value) -> bool:
+    return value is None or _is_nan(value)
+
+
+def _is_nan(value) -> bool:
+
+    # Ausente para o SimpleImputer numa coluna categórica (object): só NaN. None
+    # não é imputado e o OneHotEncoder(handle_unknown="ignore") o trata como
+    # categoria desconhecida (linha toda zero).
+
+    return isinstance(value, float) and math.isnan(value)
+
+
+class CompiledPreprocessor:
+
+    # Versão em arrays de um ColumnTransformer("num": imputer+scaler, "cat": imputer+one-hot).
+
+    def __init__(
+        self,
+        num_features,
+        medians,
+        means,
+        scales,
+        cat_features,
+        cat_fill,
+        categories,
+        dtype=np.float32
+    ):
+        self.num_features = list(num_features)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+
+        self.cat_features = list(cat_features)
+        self.cat_fill = list(cat_fill)
+        self.categories = [list(c) for c in categories]
+        self.dtype = dtype
+
+        # Tabelas de lookup: valor da categoria -> índice absoluto da coluna de saída
+        offset = len(self.num_features)
+        self.cat_offsets = []
+        self.cat_lookup = []
+        for cats in self.categories:
+            self.cat_offsets.append(offset)
+            self.cat_lookup.append({c: offset + i for i, c in enumerate(cats)})
+            offset += len(cats)
+
+        self.n_outputs = offset
+        self._zero_as_missing = [f in INVALID_ZERO_FEATURES for f in self.num_features]
+
+    # 1) Compilação a partir do sklearn
+
+    @classmethod
+    def from_column_transformer(cls, column_transformer, dtype=np.float32):
+
+        # Extrai os parâmetros ajustados do ColumnTransformer de build_preprocessor().
+
+        fitted = {
+            name: (pipe, list(cols))
+            for name, pipe, cols in column_transformer.transformers_
+            if name != "remainder"
+        }
+        if set(fitted) != {"num", "cat"}:
+            raise ValueError(f"Estrutura de ColumnTransformer não suportada: {sorted(fitted)}")
+
+        num_pipe, num_features = fitted["num"]
+        cat_pipe, cat_features = fitted["cat"]
+
+        num_imputer = num_pipe.named_steps["imputer"]
+        scaler = num_pipe.named_steps["scaler"]
+        cat_imputer = cat_pipe.named_steps["imputer"]
+        encoder = cat_pipe.named_steps["encoder"]
+
+        if getattr(encoder, "drop_idx_", None) is not None:
+            raise ValueError("OneHotEncoder com 'drop' não é suportado")
+        if getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("OneHotEncoder com categorias infrequentes não é suportado")
+
+        n_num = len(num_features)
+        means = scaler.mean_ if scaler.with_mean else np.zeros(n_num)
+        scales = scaler.scale_ if scaler.with_std else np.ones(n_num)
+
+        return cls(
+            num_features=num_features,
+            medians=num_imputer.statistics_,
+            means=means,
+            scales=scales,
+            cat_features=cat_features,
+            cat_fill=[v.item() if hasattr(v, "item") else v for v in cat_imputer.statistics_],
+            categories=[[v.item() if hasattr(v, "item") else v for v in c] for c in encoder.categories_],
+            dtype=dtype
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline, dtype=np.float32):
+        return cls.from_column_transformer(pipeline.named_steps["preprocess"], dtype=dtype)
+
+    # Serialização em tipos simples (JSON), sem objetos do sklearn
+
+    def to_dict(self) -> dict:
+        return {
+            "num_features": self.num_features,
+            "medians": self.medians.tolist(),
+            "means": self.means.tolist(),
+            "scales": self.scales.tolist(),
+            "cat_features": self.cat_features,
+            "cat_fill": self.cat_fill,
+            "categories": self.categories
+        }
+
+    @classmethod
+    def from_dict(cls, params: dict, dtype=np.float32):
+        return cls(dtype=dtype, **params)
+
+    @property
+    def feature_order(self):
+        return self.num_features + self.cat_features
+
+    def _output(self, n_rows, out):
+        if out is None:
+            return np.zeros((n_rows, self.n_outputs), dtype=self.dtype)
+        if out.shape[0] < n_rows or out.shape[1] != self.n_outputs:
+            raise ValueError(f"Matriz de saída com formato {out.shape}, esperado ({n_rows}, {self.n_outputs})")
+        out = out[:n_rows]
+        out.fill(0)
+        return out
+
+    # 2) Caminho de uma linha (dict)
+
+    def transform_one(self, record: dict, out=None) -> np.ndarray:
+
+        # Pontuação interativa: um paciente, loop Python puro sobre 11 features.
+
+        out = self._output(1, out)
+        row = out[0]
+
+        for j, feature in enumerate(self.num_features):
+            value = record.get(feature)
+            if _is_missing(value) or (self._zero_as_missing[j] and value == 0):
+                value = self.medians[j]
+            row[j] = (float(value) - self.means[j]) / self.scales[j]
+
+        for j, feature in enumerate(self.cat_features):
+            value = record.get(feature, math.nan)
+            if _is_nan(value):
+                value = self.cat_fill[j]
+            column = self.cat_lookup[j].get(value)
+            if column is not None:
+                row[column] = 1.0
+
+        return out
+
+    # 3) Caminho vetorizado (colunas NumPy)
+
+    def transform_columns(self, columns, out=None) -> np.ndarray:
+
+        # `columns` é qualquer mapeamento nome -> array (dict de arrays, DataFrame...).
+
+        n_rows = len(columns[self.feature_order[0]])
+        out = self._output(n_rows, out)
+
+        for j, feature in enumerate(self.num_features):
+            x = np.array(columns[feature], dtype=np.float64)
+            if self._zero_as_missing[j]:
+                x[x == 0] = np.nan
+            x[np.isnan(x)] = self.medians[j]
+            x -= self.means[j]
+            x /= self.scales[j]
+            out[:, j] = x
+
+        for j, feature in enumerate(self.cat_features):
+            values = np.asarray(columns[feature], dtype=object)
+            missing = np.fromiter((_is_nan(v) for v in values), dtype=bool, count=n_rows)
+            if missing.any():
+                values = values.copy()
+                values[missing] = self.cat_fill[j]
+            for category, column in self.cat_lookup[j].items():
+                out[values == category, column] = 1.0
+
+        return out
+
+    def transform_records(self, records, out=None) -> np.ndarray:
+        if len(records) == 1:
+            return self.transform_one(records[0], out)
+        columns = {f: [r.get(f, math.nan) for r in records] for f in self.feature_order}
+        return self.transform_columns(columns, out)
+
+
+def check_equivalence(pipeline, df) -> bool:
+
+    # Confere se o caminho compilado reproduz bit a bit o ColumnTransformer do pipeline.
+
+    from preprocessing import preprocess_dataframe
+
+    compiled = CompiledPreprocessor.from_pipeline(pipeline, dtype=np.float64)
+    expected = pipeline.named_steps["preprocess"].transform(preprocess_dataframe(df))
+
+    batch = compiled.transform_columns(df)
+    rows = np.vstack([compiled.transform_one(r) for r in df.to_dict(orient="records")])
+
+    return np.array_equal(batch, expected) and np.array_equal(rows, expected)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    import joblib
+    import pandas as pd
+
+    pipeline = joblib.load("../Model/model.joblib")
+    df = pd.read_csv("../Data/X_test (1).csv")
+
+    print(f"Idêntico ao sklearn: {check_equivalence(pipeline, df)}")
+
+    compiled = CompiledPreprocessor.from_pipeline(pipeline)
+    record = df.iloc[0].to_dict()
+    buffer = np.zeros((1, compiled.n_outputs), dtype=np.float32)
+
+    n = 2000
+    t_fast = timeit.timeit(lambda: compiled.transform_one(record, out=buffer), number=n) / n
+    t_sklearn = timeit.timeit(
+        lambda: pipeline.named_steps["preprocess"].transform(pd.DataFrame([record])), number=200
+    ) / 200
+    print(f"1 linha: compilado {t_fast * 1e6:.1f} µs | sklearn {t_sklearn * 1e3:.2f} ms")
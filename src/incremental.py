@@ -0,0 +1,186 @@
+# incremental.py
+# Responsável por:
+# - Atualizar o modelo salvo com um novo lote de diagnósticos confirmados, sem retreinar
+#   do zero: o XGBoost continua o boosting a partir do booster atual (árvores adicionais)
+# - Manter o pré-processador ajustado CONGELADO (as árvores existentes dependem dele)
+# - Validar o candidato num holdout antes de promovê-lo a model.joblib
+
+# Obs.: reajustar medianas/médias/escalas mudaria o espaço de features que as árvores
+# antigas usam, então a "atualização das estatísticas" é feita por um retreino completo
+# (train.py). O estado em incremental_state.json conta as atualizações desde o último
+# treino completo e avisa quando refresh_every é atingido.
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import recall_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from preprocessing import load_data, preprocess_dataframe, split_data
+
+
+DEFAULT_MODEL_PATH = "../Model/model.joblib"
+STATE_FILE = "incremental_state.json"
+
+
+def _state_path(model_path) -> Path:
+    return Path(model_path).parent / STATE_FILE
+
+
+def load_state(model_path) -> dict:
+    path = _state_path(model_path)
+    if not path.exists():
+        return {"updates_since_full_train": 0, "rows_since_full_train": 0, "history": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _evaluate(pipeline, X, y, threshold: float = 0.5) -> dict:
+    proba = pipeline.predict_proba(X)[:, 1]
+    return {
+        "roc_auc": float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else float("nan"),
+        "recall": float(recall_score(y, proba >= threshold, zero_division=0))
+    }
+
+
+def continue_boosting(pipeline, X_new, y_new, n_new_trees: int = 50) -> Pipeline:
+
+    # Novo pipeline = mesmo pré-processador (congelado) + booster atual com mais árvores.
+    # O custo é proporcional ao lote novo, não ao histórico completo.
+
+    preprocessor = pipeline.named_steps["preprocess"]
+    current = pipeline.named_steps["model"]
+
+    model = clone(current).set_params(n_estimators=n_new_trees)
+    model.fit(preprocessor.transform(X_new), y_new, xgb_model=current.get_booster())
+    # O booster tem as árvores antigas + as novas; n_estimators deve refletir o total
+    # (compaction.py e outros retreinam a partir de get_params())
+    model.set_params(n_estimators=model.get_booster().num_boosted_rounds())
+
+    return Pipeline(steps=[
+        ("preprocess", preprocessor),
+        ("model", model)
+    ])
+
+
+def update_model(
+    new_data_path: str,
+    model_path: str = DEFAULT_MODEL_PATH,
+    save_path: str = None,
+    artifact_dir: str = None,
+    holdout_path: str = None,
+    holdout_fraction: float = 0.2,
+    n_new_trees: int = 50,
+    tolerance: float = 0.005,
+    refresh_every: int = 30,
+    target: str = "HeartDisease"
+) -> dict:
+    """
+    Continua o boosting do modelo salvo com o lote em new_data_path, partindo de
+    save_path se ele já existir (atualizações anteriores) ou de model_path.
+    Holdout: holdout_path (se informado) ou uma fração estratificada do próprio lote.
+    O candidato só é promovido se a AUC e o recall no holdout não caírem mais que
+    `tolerance` em relação ao modelo atual. Retorna um relatório (dict).
+    """
+
+    start = time.perf_counter()
+    save_path = Path(save_path or model_path)
+
+    # Com --save diferente de --model, as atualizações se acumulam no modelo salvo:
+    # o --model só é o ponto de partida enquanto save_path ainda não existe
+    current = joblib.load(save_path if save_path.exists() else model_path)
+    df_new = preprocess_dataframe(load_data(new_data_path))
+
+    if holdout_path is not None:
+        X_new, y_new = df_new.drop(columns=[target]), df_new[target]
+        df_holdout = preprocess_dataframe(load_data(holdout_path))
+        X_holdout, y_holdout = df_holdout.drop(columns=[target]), df_holdout[target]
+    else:
+        X_new, X_holdout, y_new, y_holdout = split_data(df_new, target, test_size=holdout_fraction)
+
+    candidate = continue_boosting(current, X_new, y_new, n_new_trees)
+
+    metrics_current = _evaluate(current, X_holdout, y_holdout)
+    metrics_candidate = _evaluate(candidate, X_holdout, y_holdout)
+    promoted = all(
+        metrics_candidate[m] >= metrics_current[m] - tolerance for m in ("roc_auc", "recall")
+    )
+
+    # O estado fica ao lado do modelo promovido (save_path): é ele que a próxima
+    # atualização lê e escreve, mesmo quando --save difere de --model.
+    state = load_state(save_path)
+
+    if promoted:
+        # Grava num arquivo temporário e troca atomicamente: quem estiver lendo
+        # (dashboard, PredictionCache) nunca vê um model.joblib pela metade.
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = save_path.with_name(save_path.name + ".tmp")
+        joblib.dump(candidate, tmp_path)
+        os.replace(tmp_path, save_path)
+
+        if artifact_dir is not None:
+            from artifact import export_artifact
+            export_artifact(candidate, artifact_dir, data_path=new_data_path, metrics=metrics_candidate)
+
+        state["updates_since_full_train"] += 1
+        state["rows_since_full_train"] += int(len(X_new))
+
+    report = {
+        "promoted": promoted,
+        "new_rows": int(len(X_new)),
+        "holdout_rows": int(len(X_holdout)),
+        "n_trees_before": current.named_steps["model"].get_booster().num_boosted_rounds(),
+        "n_trees_after": candidate.named_steps["model"].get_booster().num_boosted_rounds(),
+        "metrics_current": metrics_current,
+        "metrics_candidate": metrics_candidate,
+        "elapsed_s": time.perf_counter() - start,
+        "full_retrain_due": state["updates_since_full_train"] >= refresh_every
+    }
+
+    state["history"].append({k: report[k] for k in ("promoted", "new_rows", "n_trees_after", "metrics_candidate")})
+    with open(_state_path(save_path), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualização incremental do modelo com um novo lote.")
+    parser.add_argument("new_data", help="CSV com o novo lote rotulado (inclui HeartDisease)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--save", default=None, help="Destino do modelo promovido (padrão: --model)")
+    parser.add_argument("--artifact-dir", default=None)
+    parser.add_argument("--holdout", default=None, help="CSV de holdout (padrão: fração do lote)")
+    parser.add_argument("--trees", type=int, default=50, help="Árvores adicionais")
+    parser.add_argument("--tolerance", type=float, default=0.005)
+    args = parser.parse_args(argv)
+
+    report = update_model(
+        args.new_data,
+        model_path=args.model,
+        save_path=args.save,
+        artifact_dir=args.artifact_dir,
+        holdout_path=args.holdout,
+        n_new_trees=args.trees,
+        tolerance=args.tolerance
+    )
+
+    status = "promovido" if report["promoted"] else "NÃO promovido"
+    print(
+        f"Modelo {status}: {report['n_trees_before']} -> {report['n_trees_after']} árvores, "
+        f"{report['new_rows']} linhas novas em {report['elapsed_s']:.2f} s"
+    )
+    print(f"Holdout atual:     {report['metrics_current']}")
+    print(f"Holdout candidato: {report['metrics_candidate']}")
+    if report["full_retrain_due"]:
+        print("Aviso: muitas atualizações desde o último treino completo; rode o train.py para reajustar o pré-processamento.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+# instrumentation.py
+# Responsável por:
+# - Medir (opcionalmente) o tempo de cada etapa do caminho de pontuação:
+#     dataframe        -> montagem do DataFrame + preprocess_dataframe (scoring.py)
+#     num, num.imputer, num.scaler      -> sub-pipeline numérico do ColumnTransformer
+#     cat, cat.imputer, cat.encoder     -> sub-pipeline categórico
+#     preprocess       -> ColumnTransformer inteiro
+#     model            -> booster do XGBoost (predict_proba)
+# - Registrar histogramas (tempo por etapa, linhas por chamada) e hits/misses do cache
+# - Expor em formato texto do Prometheus e numa linha de log estruturada (JSON) periódica
+
+# Variáveis de ambiente:
+# - LIGIA_METRICS=1                 liga a instrumentação (padrão: desligada)
+# - LIGIA_METRICS_LOG_INTERVAL=60   segundos entre as linhas de log (0 desliga o log)
+
+# Desligado, nada é embrulhado: o pipeline fica intacto e os pontos de medição em
+# scoring.py/prediction_cache.py/server.py custam uma checagem de None.
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from startup import env_flag
+
+
+logger = logging.getLogger("ligia.metrics")
+
+# Buckets em segundos (1 µs a 10 s) e em linhas por chamada
+SECONDS_BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1.0, 2.5, 5.0)) + (10.0,)
+ROWS_BUCKETS = tuple(m * 10 ** e for e in range(0, 6) for m in (1, 2, 5)) + (1_000_000,)
+
+
+# 1) Histogramas e registro
+
+class Histogram:
+
+    # Histograma cumulativo de buckets fixos (mesma semântica do Prometheus).
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+
+        # Aproximação pelo limite superior do bucket que contém o quantil.
+
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            running += n
+            if running >= target:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = {}
+        self.rows_per_call = Histogram(ROWS_BUCKETS)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe_stage(self, stage: str, seconds: float, rows: int = None):
+        with self._lock:
+            hist = self.stage_seconds.get(stage)
+            if hist is None:
+                hist = self.stage_seconds[stage] = Histogram(SECONDS_BUCKETS)
+            hist.observe(seconds)
+            if rows is not None and stage == "model":
+                self.rows_per_call.observe(rows)
+
+    def record_cache(self, hits: int, misses: int):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    # Exposição
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP ligia_stage_seconds Tempo por etapa do caminho de pontuação",
+                "# TYPE ligia_stage_seconds histogram"
+            ]
+            for stage, hist in sorted(self.stage_seconds.items()):
+                lines += _histogram_lines("ligia_stage_seconds", hist, f'stage="{stage}"')
+
+            lines += [
+                "# HELP ligia_rows_per_call Linhas por chamada ao modelo",
+                "# TYPE ligia_rows_per_call histogram"
+            ]
+            lines += _histogram_lines("ligia_rows_per_call", self.rows_per_call)
+
+            lines += [
+                "# HELP ligia_cache_hits_total Acertos do cache de predições",
+                "# TYPE ligia_cache_hits_total counter",
+                f"ligia_cache_hits_total {self.cache_hits}",
+                "# HELP ligia_cache_misses_total Erros do cache de predições",
+                "# TYPE ligia_cache_misses_total counter",
+                f"ligia_cache_misses_total {self.cache_misses}"
+            ]
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+
+        # Resumo compacto para a linha de log estruturada.
+
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": hist.count,
+                    "mean_ms": 1000.0 * hist.sum / hist.count if hist.count else 0.0,
+                    "p99_ms": 1000.0 * hist.quantile(0.99)
+                }
+                for stage, hist in self.stage_seconds.items()
+            }
+            return {
+                "stages": stages,
+                "rows_per_call_mean": (
+                    self.rows_per_call.sum / self.rows_per_call.count if self.rows_per_call.count else 0.0
+                ),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses
+            }
+
+
+def _histogram_lines(name, hist, labels: str = ""):
+    sep = "," if labels else ""
+    lines = []
+    running = 0
+    for bound, n in zip(hist.buckets, hist.counts):
+        running += n
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{bound:g}"}} {running}')
+    lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {hist.count}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {hist.sum}")
+    lines.append(f"{name}_count{suffix} {hist.count}")
+    return lines
+
+
+# 2) Registro global (opt-in)
+
+_REGISTRY = MetricsRegistry() if env_flag("LIGIA_METRICS") else None
+
+
+def enable(registry: MetricsRegistry = None) -> MetricsRegistry:
+    global _REGISTRY
+    _REGISTRY = registry or MetricsRegistry()
+    return _REGISTRY
+
+
+def disable():
+    global _REGISTRY
+    _REGISTRY = None
+
+
+def get_registry():
+    return _REGISTRY
+
+
+@contextmanager
+def _timed_stage(registry, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.observe_stage(stage, time.perf_counter() - start)
+
+
+class _NoOp:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoOp()
+
+
+def stage(name: str):
+
+    # Ponto de medição para código fora do pipeline (ex.: montagem do DataFrame).
+
+    registry = _REGISTRY
+    return _NOOP if registry is None else _timed_stage(registry, name)
+
+
+def record_cache(hits: int, misses: int):
+    registry = _REGISTRY
+    if registry is not None:
+        registry.record_cache(hits, misses)
+
+
+# 3) Instrumentação do pipeline
+
+class _TimedStep:
+
+    # Proxy de uma etapa do sklearn: mede transform/predict_proba e delega o resto.
+
+    def __init__(self, inner, stage_name: str, registry: MetricsRegistry):
+        self._inner = inner
+        self._stage = stage_name
+        self._registry = registry
+
+    def _call(self, method, X, *args, **kwargs):
+        start = time.perf_counter()
+        out = getattr(self._inner, method)(X, *args, **kwargs)
+        self._registry.observe_stage(self._stage, time.perf_counter() - start, rows=_n_rows(X))
+        return out
+
+    def transform(self, X, *args, **kwargs):
+        return self._call("transform", X, *args, **kwargs)
+
+    def predict_proba(self, X, *args, **kwargs):
+        return self._call("predict_proba", X, *args, **kwargs)
+
+    def predict(self, X, *args, **kwargs):
+        return self._call("predict", X, *args, **kwargs)
+
+    def inplace_predict(self, X, *args, **kwargs):
+        return self._call("inplace_predict", X, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+def _n_rows(X) -> int:
+    # DMatrix (booster.predict) não tem len()
+    return X.num_row() if hasattr(X, "num_row") else len(X)
+
+
+def instrument_model(model, registry: MetricsRegistry = None):
+
+    # Embrulha, no próprio objeto, as etapas de um Pipeline (preprocess + model) ou de
+    # um ArtifactScorer. Aplicar uma vez, na carga do modelo.
+
+    registry = registry or _REGISTRY or enable()
+
+    if hasattr(model, "named_steps"):
+        preprocess = model.named_steps["preprocess"]
+
+        transformers = []
+        for name, trans, cols in preprocess.transformers_:
+            if hasattr(trans, "steps"):
+                trans.steps = [
+                    (step_name, _TimedStep(step, f"{name}.{step_name}", registry))
+                    for step_name, step in trans.steps
+                ]
+                trans = _TimedStep(trans, name, registry)
+            transformers.append((name, trans, cols))
+        preprocess.transformers_ = transformers
+
+        model.steps = [
+            (name, _TimedStep(step, name, registry)) for name, step in model.steps
+        ]
+    else:
+        # ArtifactScorer: o pré-processamento compilado é uma etapa só (sem num/cat
+        # separados); o atributo de instância sobrepõe o método da classe
+        model.transform = _timed_function(model.transform, "preprocess", registry)
+        model.booster = _TimedStep(model.booster, "model", registry)
+
+    return model
+
+
+def instrument_if_enabled(model):
+
+    # Chamado após carregar (e aquecer) o modelo: o aquecimento não entra nas métricas.
+
+    return model if _REGISTRY is None else instrument_model(model, _REGISTRY)
+
+
+def _timed_function(fn, stage_name: str, registry: MetricsRegistry):
+    def wrapper(X):
+        start = time.perf_counter()
+        out = fn(X)
+        registry.observe_stage(stage_name, time.perf_counter() - start)
+        return out
+    return wrapper
+
+
+# 4) Log periódico
+
+def start_periodic_log(interval_s: float = 60.0, registry: MetricsRegistry = None) -> threading.Event:
+
+    # Emite registry.snapshot() como JSON a cada interval_s. Retorna um Event para parar.
+
+    registry = registry or _REGISTRY
+    stop = threading.Event()
+    if registry is None or interval_s <= 0:
+        return stop
+
+    def _loop():
+        while not stop.wait(interval_s):
+            logger.info(json.dumps({"event": "scoring_metrics", **registry.snapshot()}))
+
+    threading.Thread(target=_loop, name="metrics-log", daemon=True).start()
+    return stop
+
+
+def log_interval_from_env(default: float = 60.0) -> float:
+    return float(os.environ.get("LIGIA_METRICS_LOG_INTERVAL", default))
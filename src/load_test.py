@@ -0,0 +1,105 @@
+# load_test.py
+# Responsável por:
+# - Gerar carga local contra o server.py (N clientes concorrentes com keep-alive)
+# - Medir latência (p50/p95/p99) e throughput das requisições POST /predict
+
+# Exemplo (com o servidor rodando):
+#   python load_test.py --concurrency 64 --requests 5000
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_DATA_PATH = "../Data/X_test (1).csv"
+
+
+def load_patients(path: str):
+
+    # Usa linhas reais do conjunto de teste como corpo das requisições.
+    # NaN não é JSON válido, então viram null.
+
+    df = pd.read_csv(path)
+    df = df.astype(object).where(df.notna(), None)
+    return [json.dumps(row).encode() for row in df.to_dict(orient="records")]
+
+
+async def _client(host, port, bodies, n_requests, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(n_requests):
+            body = bodies[i % len(bodies)]
+            request = (
+                "POST /predict HTTP/1.1\r\n"
+                f"Host: {host}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, bodies, concurrency: int, total_requests: int) -> dict:
+    latencies = []
+    per_client, remainder = divmod(total_requests, concurrency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(host, port, bodies[i::concurrency] or bodies, per_client + (i < remainder), latencies)
+        for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000.0
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "max_ms": float(lat_ms.max())
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerador de carga para o server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    bodies = load_patients(args.data)
+    result = asyncio.run(run_load(args.host, args.port, bodies, args.concurrency, args.requests))
+
+    print(
+        f"{result['requests']} requisições | concorrência {result['concurrency']} | "
+        f"{result['throughput_rps']:.0f} req/s\n"
+        f"latência: p50 {result['p50_ms']:.2f} ms | p95 {result['p95_ms']:.2f} ms | "
+        f"p99 {result['p99_ms']:.2f} ms | máx {result['max_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
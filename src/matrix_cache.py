@@ -0,0 +1,147 @@
+# matrix_cache.py
+# Responsável por:
+# - Guardar em disco as matrizes de treino/teste já transformadas (.npy), o
+#   ColumnTransformer ajustado e o perfil de referência do drift (calculado sobre o
+#   treino bruto, que o cache não guarda), endereçados por conteúdo
+# - Recarregar as matrizes com memory-map: execuções repetidas pulam a leitura do CSV,
+#   o preprocess_dataframe, o split e o fit do pré-processador, e vários processos
+#   compartilham as mesmas páginas de memória
+
+# A chave do cache é o hash de:
+# - conteúdo do arquivo de entrada
+# - código do preprocessing.py, do ingest.py e do drift.py (qualquer mudança na
+#   leitura, no tratamento ou no perfil de referência invalida o cache)
+# - parâmetros do split (target, test_size, random_state)
+# - versões do sklearn/numpy e do formato deste cache
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+import drift
+import ingest
+import preprocessing
+from artifact import file_sha256
+from drift import REFERENCE_FILE, build_reference, load_reference, save_reference
+from preprocessing import build_preprocessor, load_data, preprocess_dataframe, split_data
+
+
+CACHE_FORMAT_VERSION = 2
+DEFAULT_CACHE_DIR = "../Data/.cache"
+
+MATRIX_FILES = ("X_train", "X_test", "y_train", "y_test")
+PREPROCESSOR_FILE = "preprocessor.joblib"
+META_FILE = "meta.json"
+
+
+def cache_key(data_path, target: str = "HeartDisease", test_size: float = 0.2, random_state: int = 42) -> str:
+    import sklearn
+
+    parts = {
+        "format": CACHE_FORMAT_VERSION,
+        "data_sha256": file_sha256(data_path),
+        "preprocessing_sha256": file_sha256(preprocessing.__file__),
+        "ingest_sha256": file_sha256(ingest.__file__),
+        "drift_sha256": file_sha256(drift.__file__),
+        "split": [target, test_size, random_state],
+        "sklearn": sklearn.__version__,
+        "numpy": np.__version__
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def _build(data_path, target, test_size, random_state):
+
+    # Caminho "frio": exatamente o que prepare_data + pipeline.fit fariam, mais o
+    # perfil de drift do treino bruto (o mesmo build_reference do train.py).
+
+    df = preprocess_dataframe(load_data(data_path))
+    X_train, X_test, y_train, y_test = split_data(df, target, test_size, random_state)
+
+    preprocessor = build_preprocessor()
+    matrices = {
+        "X_train": np.ascontiguousarray(preprocessor.fit_transform(X_train), dtype=np.float32),
+        "X_test": np.ascontiguousarray(preprocessor.transform(X_test), dtype=np.float32),
+        "y_train": y_train.to_numpy(),
+        "y_test": y_test.to_numpy()
+    }
+    return matrices, preprocessor, build_reference(X_train)
+
+
+def _entry(data_path, cache_dir, target, test_size, random_state) -> Path:
+
+    # Pasta da entrada do cache, construída na primeira chamada.
+
+    key = cache_key(data_path, target, test_size, random_state)
+    entry = Path(cache_dir) / key
+
+    if not (entry / META_FILE).exists():
+        matrices, preprocessor, reference = _build(data_path, target, test_size, random_state)
+
+        # Escreve num diretório temporário e renomeia no final: um processo nunca
+        # enxerga uma entrada pela metade, mesmo com vários treinos simultâneos.
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key}-", dir=cache_dir))
+        try:
+            for name, array in matrices.items():
+                np.save(tmp / f"{name}.npy", array)
+            joblib.dump(preprocessor, tmp / PREPROCESSOR_FILE)
+            save_reference(reference, tmp / REFERENCE_FILE)
+            with open(tmp / META_FILE, "w", encoding="utf-8") as f:
+                json.dump({
+                    "data_path": str(data_path),
+                    "shapes": {name: list(a.shape) for name, a in matrices.items()}
+                }, f, indent=2)
+            os.replace(tmp, entry)
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro: usamos a dele
+            if not (entry / META_FILE).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    return entry
+
+
+def load_or_build_matrices(
+    data_path: str,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    target: str = "HeartDisease",
+    test_size: float = 0.2,
+    random_state: int = 42
+):
+    """
+    Retorna X_train, X_test, y_train, y_test (arrays, memory-mapped quando vindos do
+    cache) e o ColumnTransformer já ajustado no treino.
+    """
+
+    entry = _entry(data_path, cache_dir, target, test_size, random_state)
+    X_train, X_test, y_train, y_test = (
+        np.load(entry / f"{name}.npy", mmap_mode="r") for name in MATRIX_FILES
+    )
+    preprocessor = joblib.load(entry / PREPROCESSOR_FILE)
+
+    return X_train, X_test, y_train, y_test, preprocessor
+
+
+def load_cached_reference(
+    data_path: str,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    target: str = "HeartDisease",
+    test_size: float = 0.2,
+    random_state: int = 42
+):
+
+    # Perfil de referência do drift (drift.DriftSketch) guardado na mesma entrada.
+
+    return load_reference(_entry(data_path, cache_dir, target, test_size, random_state) / REFERENCE_FILE)
+
+
+def clear_cache(cache_dir: str = DEFAULT_CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
@@ -0,0 +1,192 @@
+# numpy_trees.py
+# Responsável por:
+# - Achatar o booster treinado (model.joblib ou artefato) em tabelas de nós compactas:
+#     feature, threshold, left, right, default_left (direção dos ausentes), value (folhas)
+# - Avaliar o ensemble em lotes com NumPy puro, nível a nível (todas as árvores e
+#   linhas avançam juntas um nível por iteração), sem importar o xgboost
+# - Conferir as probabilidades contra o XGBoost no X_test (verify_against_xgboost;
+#   coberto por tests/test_numpy_trees.py)
+
+# Obs.: em deploys de borda/serverless, importar o xgboost e montar um DMatrix por
+# chamada domina o tempo de inicialização e a latência de um paciente. Com as tabelas
+# em trees.npz + preprocessor.json, o caminho de inferência depende só de NumPy.
+
+# Semântica igual à do XGBoost: vai para a esquerda se x < threshold (em float32);
+# NaN segue default_left; margem = logit(base_score) + soma das folhas.
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+TREES_FILE = "trees.npz"
+
+# Linhas avaliadas por vez: limita a matriz (linhas x árvores) de índices de nós
+DEFAULT_BLOCK_ROWS = 4096
+
+
+def _parse_base_score(value) -> float:
+    # Versões recentes gravam "[5.531335E-1]"; antigas, "0.5"
+    return float(str(value).strip("[]"))
+
+
+class NumpyTreeEnsemble:
+
+    # Tabelas de nós de todas as árvores concatenadas; filhos usam índices globais.
+    # Nas folhas, left = right = o próprio nó, então descer além da folha não muda nada.
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, base_margin, max_depth):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    # 1) Exportação
+
+    @classmethod
+    def from_booster(cls, booster):
+
+        # Lê o dump JSON do próprio booster (save_raw) em vez de percorrer texto.
+
+        model = json.loads(booster.save_raw("json"))["learner"]
+        if model["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"Objetivo não suportado: {model['objective']['name']}")
+
+        trees = model["gradient_booster"]["model"]["trees"]
+        columns = {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "value")}
+        roots = []
+        max_depth = 0
+        offset = 0
+
+        for tree in trees:
+            left = np.asarray(tree["left_children"], dtype=np.int64)
+            right = np.asarray(tree["right_children"], dtype=np.int64)
+            is_leaf = left == -1
+            node_ids = np.arange(len(left))
+
+            columns["feature"].append(np.where(is_leaf, 0, tree["split_indices"]))
+            columns["threshold"].append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            columns["left"].append(np.where(is_leaf, node_ids, left) + offset)
+            columns["right"].append(np.where(is_leaf, node_ids, right) + offset)
+            columns["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+            # Nas folhas, split_conditions guarda o valor da folha (já com o learning rate)
+            columns["value"].append(np.where(is_leaf, tree["split_conditions"], 0.0))
+
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += len(left)
+
+        base_score = _parse_base_score(model["learner_model_param"]["base_score"])
+        return cls(
+            **{k: np.concatenate(v) for k, v in columns.items()},
+            roots=roots,
+            base_margin=np.log(base_score / (1.0 - base_score)),
+            max_depth=max_depth
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        return cls.from_booster(pipeline.named_steps["model"].get_booster())
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            base_margin=np.float64(self.base_margin), max_depth=np.int64(self.max_depth)
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{k: data[k] for k in data.files})
+
+    # 2) Avaliação
+
+    def predict_margin(self, X, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        margin = np.empty(len(X), dtype=np.float32)
+
+        for start in range(0, len(X), block_rows):
+            block = X[start:start + block_rows]
+            # nodes[i, t] = nó atual da linha i na árvore t
+            nodes = np.broadcast_to(self.roots, (len(block), self.n_trees)).copy()
+
+            for _ in range(self.max_depth):
+                x = np.take_along_axis(block, self.feature[nodes], axis=1)
+                go_left = np.where(np.isnan(x), self.default_left[nodes], x < self.threshold[nodes])
+                nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+            margin[start:start + block_rows] = self.value[nodes].sum(axis=1, dtype=np.float32)
+
+        return margin + np.float32(self.base_margin)
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = 1.0 / (1.0 + np.exp(-self.predict_margin(X).astype(np.float64)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def inplace_predict(self, X) -> np.ndarray:
+
+        # Mesma assinatura do xgboost.Booster.inplace_predict: o ArtifactScorer
+        # aceita esta classe no lugar do booster sem mudanças.
+
+        return self.predict_proba(X)[:, 1].astype(np.float32)
+
+
+def _tree_depth(left, right) -> int:
+    depth = 0
+    level = [0]
+    while level:
+        level = [c for n in level for c in (left[n], right[n]) if c != -1]
+        depth += bool(level)
+    return depth
+
+
+def verify_against_xgboost(pipeline, df, atol: float = 1e-6) -> dict:
+
+    # Confere as probabilidades do avaliador NumPy contra o predict_proba do pipeline.
+
+    from preprocessing import preprocess_dataframe
+
+    X = pipeline.named_steps["preprocess"].transform(preprocess_dataframe(df))
+    expected = pipeline.named_steps["model"].predict_proba(X)[:, 1]
+    actual = NumpyTreeEnsemble.from_pipeline(pipeline).predict_proba(X)[:, 1]
+
+    max_abs_diff = float(np.max(np.abs(actual - expected)))
+    return {"rows": len(X), "max_abs_diff": max_abs_diff, "ok": max_abs_diff <= atol}
+
+
+if __name__ == "__main__":
+    import timeit
+
+    import joblib
+    import pandas as pd
+
+    from preprocessing import preprocess_dataframe
+
+    pipeline = joblib.load("../Model/model.joblib")
+    df = pd.read_csv("../Data/X_test (1).csv")
+
+    print(f"Confere com o XGBoost: {verify_against_xgboost(pipeline, df)}")
+
+    ensemble = NumpyTreeEnsemble.from_pipeline(pipeline)
+    booster = pipeline.named_steps["model"].get_booster()
+    X = pipeline.named_steps["preprocess"].transform(preprocess_dataframe(df)).astype(np.float32)
+
+    for n_rows in (1, len(X)):
+        batch = X[:n_rows]
+        t_numpy = timeit.timeit(lambda: ensemble.inplace_predict(batch), number=200) / 200
+        t_xgb = timeit.timeit(lambda: booster.inplace_predict(batch), number=200) / 200
+        print(f"{n_rows} linha(s): NumPy {t_numpy * 1e3:.3f} ms | XGBoost {t_xgb * 1e3:.3f} ms")
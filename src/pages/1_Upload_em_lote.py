@@ -0,0 +1,139 @@
+# 1_Upload_em_lote.py
+# Responsável por:
+# - Página do dashboard para pontuar uma planilha (CSV) de pacientes de uma vez,
+#   em vez de digitar paciente por paciente no formulário
+# - Conferir as colunas do arquivo contra get_feature_groups() antes de pontuar
+# - Pontuar em blocos (batch_score.score_validated: validação + uma chamada do
+#   pipeline por bloco), com barra de progresso e os resultados parciais na tela
+#   conforme cada bloco termina
+# - Oferecer o arquivo pontuado para download
+
+# Obs.: o pipeline vem do mesmo st.cache_resource da página principal
+# (dashboard_resources.py): uma cópia por servidor, compartilhada por todos os usuários.
+
+# O progresso fica em st.session_state. Se o usuário mexer na página no meio da
+# pontuação, o Streamlit reinicia o script; a pontuação continua do bloco onde parou,
+# sem refazer os anteriores. Cada sessão roda em sua própria thread, então um upload
+# grande não trava o dashboard dos outros usuários.
+
+import io
+
+import pandas as pd
+import streamlit as st
+
+from batch_score import score_validated
+from dashboard_resources import start_model_loader
+from preprocessing import get_feature_groups
+from validation import REASONS_COLUMN
+
+
+UPLOAD_CHUNK_SIZE = 500
+PREVIEW_ROWS = 1000
+STATE_KEY = "bulk_upload"
+
+
+st.set_page_config(
+    page_title="Upload em lote - Preditor de Risco Cardíaco",
+    page_icon="❤️",
+    layout="wide"
+)
+
+st.title("📤 Pontuação em lote")
+st.markdown("Envie um arquivo CSV com um paciente por linha para pontuar todos de uma vez.")
+
+num_features, cat_features = get_feature_groups()
+required = num_features + cat_features
+st.caption(
+    f"Colunas obrigatórias: {', '.join(required)}. "
+    "Outras colunas (ex.: identificação do paciente) são mantidas no arquivo de saída."
+)
+
+
+# 1) Modelo compartilhado
+
+try:
+    model = start_model_loader().result()
+except Exception as e:
+    st.error(f"❌ Não foi possível carregar o modelo: {e}")
+    st.stop()
+
+
+# 2) Leitura e conferência do arquivo
+
+uploaded = st.file_uploader("Arquivo CSV", type="csv")
+if uploaded is None:
+    st.stop()
+
+state = st.session_state.get(STATE_KEY)
+if state is None or state["file_id"] != uploaded.file_id:
+    try:
+        df = pd.read_csv(io.BytesIO(uploaded.getvalue()))
+    except (ValueError, UnicodeDecodeError) as e:
+        st.error(f"❌ Não foi possível ler o CSV: {e}")
+        st.stop()
+    state = {"file_id": uploaded.file_id, "data": df, "parts": [], "next_row": 0, "csv": None}
+    st.session_state[STATE_KEY] = state
+
+df = state["data"]
+missing = [f for f in required if f not in df.columns]
+if missing:
+    st.error(f"❌ Colunas ausentes no arquivo: {', '.join(missing)}")
+    st.stop()
+if df.empty:
+    st.warning("O arquivo não tem nenhum paciente.")
+    st.stop()
+
+
+# 3) Pontuação em blocos, com progresso e resultados parciais
+
+progress = st.progress(0.0)
+summary = st.empty()
+preview = st.empty()
+
+
+def render():
+    done = state["next_row"]
+    progress.progress(done / len(df), text=f"{done} de {len(df)} pacientes processados")
+
+    scored = pd.concat(state["parts"]) if state["parts"] else df.iloc[:0]
+    rejected = int(scored[REASONS_COLUMN].ne("").sum()) if len(scored) else 0
+    high_risk = int((scored["risk_band"] == "alto").sum()) if len(scored) else 0
+    with summary.container():
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Pontuados", done - rejected)
+        col2.metric("Risco alto", high_risk)
+        col3.metric("Rejeitados na validação", rejected)
+    preview.dataframe(scored.head(PREVIEW_ROWS))
+    return scored
+
+
+render()
+while state["next_row"] < len(df):
+    start = state["next_row"]
+    chunk = df.iloc[start:start + UPLOAD_CHUNK_SIZE]
+    scored_chunk, _ = score_validated(model, chunk)
+    state["parts"].append(scored_chunk)
+    state["next_row"] = start + len(chunk)
+    render()
+scored = render()
+
+
+# 4) Download
+
+if state["csv"] is None:
+    state["csv"] = scored.to_csv(index=False).encode("utf-8")
+
+if len(scored) > PREVIEW_ROWS:
+    st.caption(f"Mostrando os primeiros {PREVIEW_ROWS} pacientes; o arquivo completo está no download.")
+
+rejected_rows = scored[scored[REASONS_COLUMN].ne("")]
+if len(rejected_rows):
+    with st.expander(f"⚠️ {len(rejected_rows)} paciente(s) rejeitado(s) na validação"):
+        st.dataframe(rejected_rows[[*df.columns, REASONS_COLUMN]])
+
+st.download_button(
+    "⬇️ Baixar arquivo pontuado",
+    data=state["csv"],
+    file_name=f"{uploaded.name.rsplit('.', 1)[0]}_pontuado.csv",
+    mime="text/csv"
+)
@@ -0,0 +1,239 @@
+# prediction_cache.py
+# Responsável por:
+# - Memorizar probabilidades já calculadas, com chave = tupla canônica das 11 features
+# - Limitar o tamanho com descarte LRU (menos usado recentemente sai primeiro)
+# - Contar acertos/erros (hits/misses) do cache
+# - Memorizar também as explicações (contribuições por feature, explanations.py)
+# - Invalidar tudo e recarregar o modelo quando o arquivo model.joblib mudar
+
+# Obs.: as entradas do dashboard são discretas (sliders inteiros, selectboxes) e os
+# botões de exemplo mandam sempre os mesmos vetores, então pacientes idênticos se
+# repetem muito. Um hit devolve o resultado sem passar pelo XGBoost.
+
+# A probabilidade é guardada sem limiar; label/faixa de risco são derivados na saída,
+# então mudar o limiar não invalida o cache.
+
+import math
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrument_if_enabled, record_cache, stage
+from preprocessing import INVALID_ZERO_FEATURES, get_feature_groups, preprocess_dataframe
+from scoring import DEFAULT_THRESHOLD, patient_result
+from startup import load_model
+
+
+def _canonical_number(value, zero_as_missing: bool):
+
+    # 40, 40.0 e np.int64(40) viram a mesma chave; ausentes (e zeros inválidos) viram None,
+    # exatamente como o preprocess_dataframe os trataria.
+
+    if value is None:
+        return None
+    value = float(value)
+    if math.isnan(value) or (zero_as_missing and value == 0):
+        return None
+    return value
+
+
+# Chave de uma categoria NaN (nenhuma categoria real é uma tupla)
+_IMPUTED_CATEGORY = ("NaN",)
+
+
+def _canonical_category(value):
+
+    # Categorias são mantidas como estão (FastingBS=1 e FastingBS="1" dão predições
+    # diferentes no OneHotEncoder). Apenas escalares NumPy viram tipos Python.
+    # NaN e None têm chaves diferentes: o SimpleImputer preenche NaN com a moda, mas
+    # não imputa None, que o OneHotEncoder trata como categoria desconhecida.
+
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return _IMPUTED_CATEGORY
+    return value
+
+
+class PredictionCache:
+
+    # Cache LRU de probabilidades na frente do pipeline. Seguro para múltiplas threads
+    # (o Streamlit atende cada sessão em uma thread).
+
+    def __init__(self, model_path: str, model=None, maxsize: int = 4096):
+        self.model_path = model_path
+        self.maxsize = maxsize
+        self.num_features, self.cat_features = get_feature_groups()
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._explanations = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+        self._signature = self._artifact_signature()
+        self.model = model if model is not None else load_model(model_path)
+
+    # 1) Chave canônica e versão do artefato
+
+    def make_key(self, patient: dict) -> tuple:
+        numeric = tuple(
+            _canonical_number(patient.get(f), f in INVALID_ZERO_FEATURES) for f in self.num_features
+        )
+        # Feature ausente do dict vira NaN no DataFrame do pipeline
+        categorical = tuple(_canonical_category(patient.get(f, math.nan)) for f in self.cat_features)
+        return numeric + categorical
+
+    def _artifact_signature(self):
+
+        # Para diretórios de artefato, o manifest.json é reescrito a cada exportação.
+
+        path = self.model_path
+        if os.path.isdir(path):
+            path = os.path.join(path, "manifest.json")
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _check_artifact(self):
+
+        # Se o model.joblib foi substituído, descarta o cache e recarrega o modelo.
+
+        signature = self._artifact_signature()
+        if signature is None or signature == self._signature:
+            return
+
+        model = instrument_if_enabled(load_model(self.model_path))
+        with self._lock:
+            self.model = model
+            self._signature = signature
+            self._entries.clear()
+            self._explanations.clear()
+            self._invalidations += 1
+
+    # 2) Pontuação com memorização
+
+    def _lookup(self, store, keys):
+
+        # Separa as chaves já memorizadas (hits) das que precisam passar pelo modelo.
+        # Chamar com o lock adquirido.
+
+        found, missing = {}, {}
+        for i, key in enumerate(keys):
+            if key in store:
+                store.move_to_end(key)
+                found[i] = store[key]
+            else:
+                missing.setdefault(key, []).append(i)
+        return found, missing
+
+    def _remember(self, store, model, items):
+
+        # Grava (chave, valor) e aplica o descarte LRU. Chamar com o lock adquirido.
+        # Não grava resultados de um modelo que foi trocado no meio da chamada.
+
+        if model is not self.model:
+            return
+        for key, value in items:
+            store[key] = value
+            store.move_to_end(key)
+        while len(store) > self.maxsize:
+            store.popitem(last=False)
+
+    def predict_proba_many(self, patients) -> np.ndarray:
+
+        # Probabilidades da classe positiva; só os pacientes ausentes do cache
+        # vão para o pipeline, todos juntos em uma única chamada.
+
+        self._check_artifact()
+
+        keys = [self.make_key(p) for p in patients]
+        probabilities = np.empty(len(keys), dtype=np.float64)
+
+        with self._lock:
+            model = self.model
+            found, missing = self._lookup(self._entries, keys)
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+        record_cache(len(found), len(keys) - len(found))
+
+        for i, probability in found.items():
+            probabilities[i] = probability
+
+        if missing:
+            rows = [patients[idx[0]] for idx in missing.values()]
+            with stage("dataframe"):
+                X = preprocess_dataframe(pd.DataFrame(rows, columns=self.num_features + self.cat_features))
+            computed = model.predict_proba(X)[:, 1]
+
+            for idx, probability in zip(missing.values(), computed):
+                probabilities[idx] = probability
+            with self._lock:
+                self._remember(self._entries, model, zip(missing.keys(), map(float, computed)))
+
+        return probabilities
+
+    def explain_many(self, patients) -> pd.DataFrame:
+
+        # Contribuições por feature (explanations.explain_batch), memorizadas com a
+        # mesma chave e o mesmo limite das probabilidades.
+
+        from explanations import BASE_VALUE, explain_batch
+
+        self._check_artifact()
+
+        keys = [self.make_key(p) for p in patients]
+        columns = self.num_features + self.cat_features
+        values = np.empty((len(keys), len(columns) + 1), dtype=np.float64)
+
+        with self._lock:
+            model = self.model
+            found, missing = self._lookup(self._explanations, keys)
+
+        for i, row in found.items():
+            values[i] = row
+
+        if missing:
+            rows = [patients[idx[0]] for idx in missing.values()]
+            computed = explain_batch(model, pd.DataFrame(rows, columns=columns)).to_numpy(dtype=np.float64)
+
+            for idx, row in zip(missing.values(), computed):
+                values[idx] = row
+            with self._lock:
+                self._remember(self._explanations, model, zip(missing.keys(), computed))
+
+        return pd.DataFrame(values, columns=columns + [BASE_VALUE])
+
+    # 3) Atalhos para um paciente
+
+    def score(self, patient: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+        probability = self.predict_proba_many([patient])[0]
+        return patient_result(probability, threshold)
+
+    def explain(self, patient: dict) -> pd.Series:
+        return self.explain_many([patient]).iloc[0]
+
+    # 4) Estatísticas
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explanations.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "invalidations": self._invalidations
+            }
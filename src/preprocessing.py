@@ -8,21 +8,28 @@
 
 # Obs.: NÃO treina modelo aqui. 
 
+# Obs. 2: os imports do sklearn ficam dentro das funções que os usam. Assim os
+# caminhos de inferência (que só precisam de preprocess_dataframe e get_feature_groups)
+# não pagam o import do sklearn na inicialização (ver startup.py).
+
+import numpy as np
 import pandas as pd
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import train_test_split
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from ingest import iter_csv_typed, read_raw
+
+
+# Features em que o valor 0 é fisiologicamente improvável e vira NaN (ver EDA)
+INVALID_ZERO_FEATURES = ("RestingBP", "Cholesterol")
 
 
 # 1) Carregamento dos dados
 
-def load_data(path: str) -> pd.DataFrame:
+def load_data(path: str, columns=None) -> pd.DataFrame:
 
-    #Lê o dataset a partir de um caminho (CSV) e retorna um DataFrame.
+    #Lê o dataset a partir de um caminho (CSV ou Parquet) e retorna um DataFrame.
+    # Tipos explícitos (float32/category) e cache Parquet: ver ingest.py
 
-    df = pd.read_csv(path)
+    df = read_raw(path, columns)
     return df
 
 
@@ -44,11 +51,9 @@ def preprocess_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
 
     # Substitui valores inválidos (0) por NaN para serem imputados no pipeline
-    if "RestingBP" in df.columns:
-        df.loc[df["RestingBP"] == 0, "RestingBP"] = pd.NA
-
-    if "Cholesterol" in df.columns:
-        df.loc[df["Cholesterol"] == 0, "Cholesterol"] = pd.NA
+    for col in INVALID_ZERO_FEATURES:
+        if col in df.columns:
+            df.loc[df[col] == 0, col] = pd.NA
 
     return df
 
@@ -90,6 +95,11 @@ def build_preprocessor():
   
     # Cria o ColumnTransformer com pipelines separados para dados numéricos e categóricos.
    
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
     num_features, cat_features = get_feature_groups()
 
     numeric_pipeline = Pipeline(steps=[
@@ -115,18 +125,25 @@ def build_preprocessor():
 
 # 5) Split treino/teste (estratificado)
 
-def split_data(df: pd.DataFrame, target: str = "HeartDisease"):
+def split_data(
+    df: pd.DataFrame,
+    target: str = "HeartDisease",
+    test_size: float = 0.2,
+    random_state: int = 42
+):
     
     # Realiza a separação treino/teste de forma estratificada.
     
+    from sklearn.model_selection import train_test_split
+
     X = df.drop(columns=[target])
     y = df[target]
 
     return train_test_split(
         X,
         y,
-        test_size=0.2,
-        random_state=42,
+        test_size=test_size,
+        random_state=random_state,
         stratify=y
     )
 
@@ -147,4 +164,104 @@ def prepare_data(path: str):
 
     preprocessor = build_preprocessor()
 
-    return X_train, X_test, y_train, y_test, preprocessor
\ No newline at end of file
+    return X_train, X_test, y_train, y_test, preprocessor
+
+
+# 7) Leitura em blocos e ajuste do pré-processamento em streaming
+#    (para bases maiores que a memória; ver train_out_of_core.py)
+
+def iter_data_chunks(path: str, chunk_size: int = 100_000):
+
+    # Lê o CSV em blocos (tipado, ver ingest.py) e aplica o mesmo tratamento inicial
+    # do preprocess_dataframe.
+
+    for chunk in iter_csv_typed(path, chunk_size):
+        yield preprocess_dataframe(chunk)
+
+
+def holdout_mask(chunk_index: int, n_rows: int, test_size: float = 0.2, random_state: int = 42):
+
+    # Sorteio determinístico de quais linhas do bloco vão para o teste.
+    # Depende só de (semente, índice do bloco), então é igual em todas as passadas.
+
+    rng = np.random.default_rng([random_state, chunk_index])
+    return rng.random(n_rows) < test_size
+
+
+def fit_streaming_preprocessor(
+    path: str,
+    chunk_size: int = 100_000,
+    target: str = "HeartDisease",
+    test_size: float = 0.2,
+    random_state: int = 42
+) -> dict:
+
+    # Primeira passada: ajusta as mesmas estatísticas do build_preprocessor() usando
+    # só as linhas de treino, sem carregar a base inteira:
+    # - numéricas: contagem por valor distinto -> mediana exata, média e desvio padrão
+    #   após a imputação (as features clínicas são discretas: poucos valores distintos)
+    # - categóricas: contagem por categoria -> moda (imputação) e vocabulário do one-hot
+    # Retorna os parâmetros no formato de CompiledPreprocessor.to_dict().
+
+    num_features, cat_features = get_feature_groups()
+    num_counts = {f: pd.Series(dtype="float64") for f in num_features}
+    num_missing = dict.fromkeys(num_features, 0)
+    cat_counts = {f: pd.Series(dtype="float64") for f in cat_features}
+
+    for i, chunk in enumerate(iter_data_chunks(path, chunk_size)):
+        chunk = chunk[~holdout_mask(i, len(chunk), test_size, random_state)]
+
+        for f in num_features:
+            values = pd.to_numeric(chunk[f], errors="coerce")
+            num_missing[f] += int(values.isna().sum())
+            num_counts[f] = num_counts[f].add(values.value_counts(), fill_value=0)
+
+        for f in cat_features:
+            # Colunas category contam também categorias sem linhas (ex.: só no holdout)
+            counts = chunk[f].value_counts()
+            cat_counts[f] = cat_counts[f].add(counts[counts > 0], fill_value=0)
+
+    medians, means, scales = [], [], []
+    for f in num_features:
+        counts = num_counts[f].sort_index()
+        values, freq = counts.index.to_numpy(dtype=np.float64), counts.to_numpy()
+
+        # Mediana exata a partir das contagens (média dos dois centrais se n for par)
+        n = freq.sum()
+        cum = np.cumsum(freq)
+        lower = values[np.searchsorted(cum, (n - 1) // 2, side="right")]
+        upper = values[np.searchsorted(cum, n // 2, side="right")]
+        median = (lower + upper) / 2.0
+
+        # Média/variância populacional depois da imputação (como o StandardScaler)
+        values = np.append(values, median)
+        freq = np.append(freq, num_missing[f])
+        total = freq.sum()
+        mean = float(np.sum(values * freq) / total)
+        var = float(np.sum(freq * (values - mean) ** 2) / total)
+
+        medians.append(float(median))
+        means.append(mean)
+        scales.append(float(np.sqrt(var)) if var > 0 else 1.0)
+
+    cat_fill, categories = [], []
+    for f in cat_features:
+        counts = cat_counts[f]
+        # Moda; empate -> menor valor (mesmo critério do SimpleImputer most_frequent)
+        top = counts[counts == counts.max()].index
+        cat_fill.append(_to_python(sorted(top)[0]))
+        categories.append([_to_python(c) for c in sorted(counts.index)])
+
+    return {
+        "num_features": num_features,
+        "medians": medians,
+        "means": means,
+        "scales": scales,
+        "cat_features": cat_features,
+        "cat_fill": cat_fill,
+        "categories": categories
+    }
+
+
+def _to_python(value):
+    return value.item() if hasattr(value, "item") else value
@@ -0,0 +1,297 @@
+# registry.py
+# Responsável por:
+# - Manter um cadastro persistente de pacientes em SQLite (um registro por ID):
+#   features, hash do conteúdo da linha, probabilidade e versão do modelo que a gerou
+# - Na rodada noturna, ler o arquivo de pacientes em blocos e descobrir, por bloco,
+#   quem é novo, quem mudou (hash diferente) e quem foi pontuado por outro modelo
+# - Repontuar SÓ essas linhas, em lotes vetorizados (validate_batch + score_batch),
+#   e manter as probabilidades das demais
+# - Exportar o cadastro pontuado (label/faixa de risco derivados na saída)
+
+# Obs.: o hash da linha é vetorizado (pd.util.hash_pandas_object) sobre as 11 features,
+# com as numéricas em float64 (40 e 40.0 dão o mesmo hash). A comparação com o cadastro
+# é um LEFT JOIN de uma tabela temporária com os IDs do bloco contra a chave primária,
+# então a memória fica limitada ao bloco e o custo do modelo acompanha a rotatividade
+# (churn) do cadastro, não o seu tamanho.
+
+# Como no prediction_cache.py, a probabilidade é guardada sem limiar: mudar o limiar
+# não obriga a repontuar. Rejeitadas pela validação ficam com probability NULL e os
+# motivos em rejection_reasons; também levam a versão, para não revalidar sem mudança.
+
+# Pacientes que não aparecem no arquivo continuam no cadastro como estavam. O único
+# estado que cresce com o arquivo é o conjunto de IDs já vistos na rodada.
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from artifact import MANIFEST_FILE, file_sha256
+from batch_score import DEFAULT_CHUNK_SIZE, ChunkWriter, iter_chunks
+from preprocessing import get_feature_groups
+from scoring import DEFAULT_THRESHOLD, build_result_frame, score_batch
+from startup import load_model
+from validation import REASONS_COLUMN, validate_batch
+
+
+DEFAULT_MODEL_PATH = "../Model/model.joblib"
+DEFAULT_REGISTRY_PATH = "../Data/registry.sqlite"
+DEFAULT_ID_COLUMN = "patient_id"
+
+TABLE = "patients"
+
+# Motivos de repontuação (contados em delta_score)
+NEW = "new"
+CHANGED = "changed"
+STALE_MODEL = "stale_model"
+
+
+# 1) Versão do modelo e hash das linhas
+
+def model_version_for(model_path: str) -> str:
+
+    # Artefato: model_version do manifest (sha256 do booster). Pipeline joblib: sha256
+    # do próprio arquivo, no mesmo formato (16 primeiros hex).
+
+    if os.path.isdir(model_path):
+        with open(Path(model_path) / MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)["model_version"]
+    return file_sha256(model_path)[:16]
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+
+    # Hash de 64 bits por linha sobre as 11 features, como int64 (o INTEGER do SQLite
+    # é com sinal). Independente do índice e da ordem das colunas na entrada.
+
+    num_features, cat_features = get_feature_groups()
+    features = pd.concat([
+        df[num_features].apply(pd.to_numeric, errors="coerce").astype(np.float64),
+        df[cat_features].astype(object)
+    ], axis=1)
+    return pd.util.hash_pandas_object(features, index=False).to_numpy().view(np.int64)
+
+
+# 2) Cadastro em SQLite
+
+def _feature_columns():
+    num_features, cat_features = get_feature_groups()
+    return num_features + cat_features
+
+
+def connect(registry_path: str) -> sqlite3.Connection:
+
+    # Abre (ou cria) o cadastro. WAL + synchronous=NORMAL: cada bloco é uma transação
+    # e uma rodada interrompida mantém tudo o que já foi gravado.
+
+    Path(registry_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(registry_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    num_features, cat_features = get_feature_groups()
+    feature_ddl = ", ".join([f'"{f}" REAL' for f in num_features] + [f'"{f}"' for f in cat_features])
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+        f"patient_id TEXT PRIMARY KEY, {feature_ddl}, row_hash INTEGER NOT NULL, "
+        f"model_version TEXT NOT NULL, probability REAL, {REASONS_COLUMN} TEXT, scored_at REAL)"
+    )
+    return conn
+
+
+def _find_stale(conn, ids, hashes, model_version: str) -> dict:
+
+    # patient_id -> motivo (NEW, CHANGED ou STALE_MODEL) para as linhas do bloco que
+    # precisam de pontuação. As demais já estão atualizadas no cadastro.
+
+    # Os IDs do bloco já vêm sem repetição; o JOIN usa o índice da chave do cadastro.
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (patient_id TEXT, row_hash INTEGER)")
+    conn.execute("DELETE FROM incoming")
+    conn.executemany("INSERT INTO incoming VALUES (?, ?)", zip(ids, hashes.tolist()))
+
+    rows = conn.execute(
+        f"SELECT i.patient_id, CASE "
+        f"WHEN p.patient_id IS NULL THEN '{NEW}' "
+        f"WHEN p.row_hash != i.row_hash THEN '{CHANGED}' "
+        f"ELSE '{STALE_MODEL}' END "
+        f"FROM incoming i LEFT JOIN {TABLE} p ON p.patient_id = i.patient_id "
+        f"WHERE p.patient_id IS NULL OR p.row_hash != i.row_hash OR p.model_version != ?",
+        (model_version,)
+    )
+    return dict(rows.fetchall())
+
+
+def _upsert(conn, chunk: pd.DataFrame, ids, hashes, model_version: str, probabilities, reasons):
+
+    # Grava as linhas repontuadas (substitui o registro inteiro do paciente).
+
+    features = _feature_columns()
+    values = chunk[features].astype(object)
+    values = values.where(values.notna(), None)
+
+    now = time.time()
+    records = zip(
+        ids, *(values[f].tolist() for f in features), hashes.tolist(),
+        [model_version] * len(ids), probabilities, reasons, [now] * len(ids)
+    )
+    columns = ", ".join(["patient_id"] + [f'"{f}"' for f in features] + [
+        "row_hash", "model_version", "probability", REASONS_COLUMN, "scored_at"
+    ])
+    placeholders = ", ".join(["?"] * (len(features) + 6))
+    conn.executemany(f"INSERT OR REPLACE INTO {TABLE} ({columns}) VALUES ({placeholders})", records)
+
+
+# 3) Rodada de repontuação incremental
+
+def _score_stale(model, stale: pd.DataFrame, validate: bool):
+
+    # (probabilidades, motivos de rejeição) como listas Python, com None onde não se aplica.
+
+    if not validate:
+        return score_batch(model, stale)["probability"].tolist(), [None] * len(stale)
+
+    validation = validate_batch(stale)
+    probabilities = np.full(len(stale), None, dtype=object)
+    if len(validation.accepted):
+        probabilities[~validation.rejected_mask] = score_batch(model, validation.accepted)["probability"].to_numpy()
+    return probabilities.tolist(), [r or None for r in validation.reasons.tolist()]
+
+
+def delta_score(
+    input_path: str,
+    registry_path: str = DEFAULT_REGISTRY_PATH,
+    model_path: str = DEFAULT_MODEL_PATH,
+    id_column: str = DEFAULT_ID_COLUMN,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    validate: bool = True,
+    model=None
+) -> dict:
+    """
+    Sincroniza o cadastro com o arquivo de pacientes (CSV ou Parquet, com a coluna
+    id_column + as 11 features) e repontua apenas as linhas novas, alteradas ou
+    pontuadas por outra versão do modelo. O modelo só é carregado se houver algo a
+    repontuar. Retorna um dict com as contagens da rodada e os tempos.
+    """
+
+    model_version = model_version_for(model_path)
+    counts = {"rows": 0, NEW: 0, CHANGED: 0, STALE_MODEL: 0, "rescored": 0, "rejected": 0, "duplicates": 0}
+    start = time.perf_counter()
+    model_seconds = 0.0
+
+    seen = set()
+
+    conn = connect(registry_path)
+    try:
+        for chunk in iter_chunks(input_path, chunk_size):
+            counts["rows"] += len(chunk)
+
+            # IDs repetidos no arquivo: vale a primeira ocorrência (com a última, um ID
+            # repetido em blocos diferentes trocaria de linha e seria repontuado toda noite)
+            chunk = chunk.assign(**{id_column: chunk[id_column].astype(str)})
+            first = np.zeros(len(chunk), dtype=bool)
+            for i, patient_id in enumerate(chunk[id_column].tolist()):
+                if patient_id not in seen:
+                    seen.add(patient_id)
+                    first[i] = True
+            deduped = chunk[first]
+            counts["duplicates"] += len(chunk) - len(deduped)
+
+            hashes = row_hashes(deduped)
+            with conn:
+                stale_reasons = _find_stale(conn, deduped[id_column].tolist(), hashes, model_version)
+            if not stale_reasons:
+                continue
+
+            mask = deduped[id_column].isin(stale_reasons).to_numpy()
+            stale = deduped[mask]
+            ids = stale[id_column].tolist()
+            for reason in stale_reasons.values():
+                counts[reason] += 1
+
+            if model is None:
+                model = load_model(model_path)
+            model_start = time.perf_counter()
+            probabilities, reasons = _score_stale(model, stale, validate)
+            model_seconds += time.perf_counter() - model_start
+
+            with conn:
+                _upsert(conn, stale, ids, hashes[mask], model_version, probabilities, reasons)
+
+            counts["rescored"] += len(ids)
+            counts["rejected"] += sum(r is not None for r in reasons)
+    finally:
+        conn.close()
+
+    counts["unchanged"] = counts["rows"] - counts["duplicates"] - counts["rescored"]
+    counts["model_version"] = model_version
+    counts["score_s"] = model_seconds
+    counts["total_s"] = time.perf_counter() - start
+    return counts
+
+
+# 4) Leitura / exportação do cadastro
+
+def iter_registry(registry_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, threshold: float = DEFAULT_THRESHOLD):
+
+    # Blocos do cadastro com label, confidence e risk_band derivados da probabilidade
+    # guardada (rejeitadas ficam com NaN nas colunas de resultado).
+
+    conn = connect(registry_path)
+    try:
+        query = f"SELECT * FROM {TABLE} ORDER BY patient_id"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            accepted = chunk["probability"].notna()
+            results = build_result_frame(
+                chunk.loc[accepted, "probability"], threshold, index=chunk.index[accepted]
+            ).reindex(chunk.index)
+            yield pd.concat([chunk.drop(columns="probability"), results], axis=1)
+    finally:
+        conn.close()
+
+
+def export_registry(
+    registry_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, threshold: float = DEFAULT_THRESHOLD
+) -> int:
+
+    # Grava o cadastro pontuado em CSV/Parquet (pela extensão), em streaming.
+
+    writer = ChunkWriter(output_path)
+    n_rows = 0
+    try:
+        for chunk in iter_registry(registry_path, chunk_size, threshold):
+            writer.write(chunk)
+            n_rows += len(chunk)
+    finally:
+        writer.close()
+    return n_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Repontuação incremental de um cadastro de pacientes.")
+    parser.add_argument("input", help="Arquivo de pacientes (.csv ou .parquet) com a coluna de ID")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_PATH, help="Arquivo SQLite do cadastro")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="model.joblib ou diretório de artefato")
+    parser.add_argument("--id-column", default=DEFAULT_ID_COLUMN)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--no-validate", action="store_true", help="Pula a validação de faixas/categorias")
+    parser.add_argument("--output", default=None, help="Exporta o cadastro pontuado (.csv ou .parquet)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Limiar de decisão da exportação")
+    args = parser.parse_args(argv)
+
+    counts = delta_score(
+        args.input, args.registry, args.model, args.id_column, args.chunk_size, not args.no_validate
+    )
+    print(json.dumps(counts, indent=2))
+
+    if args.output:
+        n_rows = export_registry(args.registry, args.output, args.chunk_size, args.threshold)
+        print(f"{n_rows} pacientes exportados em: {Path(args.output).resolve()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# scoring.py
+# Responsável por:
+# - Oferecer UMA função de pontuação para o dashboard, o lote e o serviço HTTP
+# - Rodar o pipeline uma única vez (predict_proba) e derivar dali o rótulo,
+#   a confiança e a faixa de risco, com limiar de decisão configurável
+
+# Obs.: antes o Inference.py chamava predict() e predict_proba() separadamente,
+# o que rodava o pré-processamento e as 200 árvores duas vezes por análise.
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+from preprocessing import get_feature_groups, preprocess_dataframe
+
+
+# Limiar padrão. Aqui probabilidade >= limiar é positivo; o model.predict do XGBoost
+# usa > 0.5, então os dois só divergem numa probabilidade exatamente igual a 0,5
+DEFAULT_THRESHOLD = 0.5
+
+# Faixas de risco exibidas no dashboard: < 30% baixo, 30-70% moderado, > 70% alto
+RISK_BAND_EDGES = (0.30, 0.70)
+RISK_BAND_LABELS = ("baixo", "moderado", "alto")
+
+
+def risk_band(probability):
+
+    # Faixa de risco para um valor escalar ou um array de probabilidades. Os limites
+    # seguem o texto do dashboard: 30% e 70% exatos ainda são "moderado".
+
+    low, high = RISK_BAND_EDGES
+    bands = np.asarray(RISK_BAND_LABELS, dtype=object)
+    idx = (np.asarray(probability) >= low).astype(np.int64) + (np.asarray(probability) > high)
+    return bands[idx] if np.ndim(idx) else bands[int(idx)]
+
+
+def build_result_frame(probabilities, threshold: float = DEFAULT_THRESHOLD, index=None) -> pd.DataFrame:
+
+    # Monta o resultado padronizado a partir das probabilidades da classe positiva.
+
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    return pd.DataFrame({
+        "label": (probabilities >= threshold).astype(np.int8),
+        "probability": probabilities,
+        "confidence": np.maximum(probabilities, 1.0 - probabilities),
+        "risk_band": risk_band(probabilities)
+    }, index=index)
+
+
+def patient_result(probability: float, threshold: float = DEFAULT_THRESHOLD) -> dict:
+
+    # Resultado de um único paciente no mesmo formato do build_result_frame.
+
+    probability = float(probability)
+    return {
+        "label": int(probability >= threshold),
+        "probability": probability,
+        "confidence": max(probability, 1.0 - probability),
+        "risk_band": risk_band(probability)
+    }
+
+
+def score_batch(model, df: pd.DataFrame, threshold: float = DEFAULT_THRESHOLD) -> pd.DataFrame:
+    """
+    Pontua um lote de pacientes (DataFrame bruto com as 11 features) em uma única
+    passada pelo pipeline. Retorna um DataFrame com label, probability, confidence
+    e risk_band, alinhado ao índice da entrada.
+    """
+
+    with stage("dataframe"):
+        X = preprocess_dataframe(df)
+    probabilities = model.predict_proba(X)[:, 1]
+    return build_result_frame(probabilities, threshold, index=df.index)
+
+
+def score_patient(model, patient: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """
+    Pontua um único paciente (dict com as 11 features).
+    Retorna um dict com label, probability, confidence e risk_band.
+    """
+
+    num_features, cat_features = get_feature_groups()
+    with stage("dataframe"):
+        X = preprocess_dataframe(pd.DataFrame([patient], columns=num_features + cat_features))
+    probability = model.predict_proba(X)[0, 1]
+
+    return patient_result(probability, threshold)
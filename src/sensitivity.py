@@ -0,0 +1,83 @@
+# sensitivity.py
+# Responsável por:
+# - Análises "e se?": como o risco muda quando UMA ou DUAS variáveis numéricas variam,
+#   com as demais fixas nos valores atuais do formulário
+# - Montar a grade inteira como um único lote e pontuar com UMA chamada vetorizada
+#   de predict_proba (centenas a milhares de pontos em bem menos de 1 segundo)
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import get_feature_groups, preprocess_dataframe
+
+
+# Faixas padrão (as mesmas dos sliders do dashboard)
+SWEEP_RANGES = {
+    "Age": (20, 100),
+    "RestingBP": (80, 200),
+    "Cholesterol": (100, 600),
+    "MaxHR": (60, 220),
+    "Oldpeak": (0.0, 6.0)
+}
+
+
+def sweep_values(feature: str, n_points: int = 200) -> np.ndarray:
+    low, high = SWEEP_RANGES[feature]
+    return np.linspace(low, high, n_points)
+
+
+def build_grid(base_patient: dict, variables: dict) -> pd.DataFrame:
+
+    # Repete o paciente base para cada ponto do produto cartesiano de `variables`
+    # (dict feature -> valores). A primeira variável varia mais devagar (ordem "ij").
+
+    num_features, cat_features = get_feature_groups()
+    columns = num_features + cat_features
+
+    axes = np.meshgrid(*[np.asarray(v) for v in variables.values()], indexing="ij")
+    n_points = axes[0].size
+
+    grid = {
+        col: np.repeat(np.asarray([base_patient[col]], dtype=object), n_points)
+        for col in columns
+    }
+    for feature, axis in zip(variables, axes):
+        grid[feature] = axis.ravel()
+
+    df = pd.DataFrame(grid, columns=columns)
+    df[num_features] = df[num_features].astype(np.float64)
+    return df
+
+
+def _predict_grid(model, df: pd.DataFrame) -> np.ndarray:
+    return model.predict_proba(preprocess_dataframe(df))[:, 1]
+
+
+def sweep_1d(model, base_patient: dict, feature: str, values=None) -> pd.DataFrame:
+    """
+    Curva de risco variando uma feature numérica.
+    Retorna DataFrame com as colunas [feature, "probability"].
+    """
+
+    values = sweep_values(feature) if values is None else np.asarray(values)
+    grid = build_grid(base_patient, {feature: values})
+    return pd.DataFrame({feature: values, "probability": _predict_grid(model, grid)})
+
+
+def sweep_2d(model, base_patient: dict, feature_x: str, feature_y: str, values_x=None, values_y=None) -> pd.DataFrame:
+    """
+    Mapa de risco variando duas features numéricas.
+    Retorna DataFrame (linhas = valores de feature_y, colunas = valores de feature_x).
+    """
+
+    values_x = sweep_values(feature_x, 60) if values_x is None else np.asarray(values_x)
+    values_y = sweep_values(feature_y, 60) if values_y is None else np.asarray(values_y)
+
+    grid = build_grid(base_patient, {feature_y: values_y, feature_x: values_x})
+    probabilities = _predict_grid(model, grid).reshape(len(values_y), len(values_x))
+
+    return pd.DataFrame(
+        probabilities,
+        index=pd.Index(values_y, name=feature_y),
+        columns=pd.Index(values_x, name=feature_x)
+    )
@@ -0,0 +1,305 @@
+# server.py
+# Responsável por:
+# - Servir o pipeline salvo via HTTP (asyncio puro, sem Streamlit)
+# - Carregar o modelo UMA vez na inicialização
+# - Agrupar requisições individuais em micro-lotes (tamanho máximo e espera máxima
+#   configuráveis) e fazer UMA chamada vetorizada de predict_proba por lote
+
+# Obs.: chamadas de uma linha ao XGBoost são dominadas pelo custo fixo por chamada
+# (DataFrame, ColumnTransformer, DMatrix). Agrupar N pacientes custa quase o mesmo
+# que pontuar um, então o throughput cresce sem piorar a latência p99.
+
+# Endpoints:
+# - POST /predict  -> corpo JSON com as 11 features; responde label, probability,
+#                     confidence e risk_band (scoring.patient_result), ou 400 com
+#                     os motivos se o paciente falhar na validação (validation.py)
+# - GET  /health   -> status e configuração do micro-batching
+# - GET  /metrics  -> métricas por etapa no formato texto do Prometheus
+#                     (só com LIGIA_METRICS=1; ver instrumentation.py)
+# - GET  /drift    -> PSI/KS por feature na janela deslizante contra o perfil do
+#                     treino (só com LIGIA_DRIFT=1; ver drift.py)
+# - GET  /shadow   -> concordância e latência do campeão e de cada desafiante
+#                     (só com --challenger; ver shadow.py)
+
+import argparse
+import asyncio
+import json
+import logging
+
+import pandas as pd
+
+import drift
+import instrumentation
+from shadow import ShadowScorer, load_shadow_scorer
+from preprocessing import get_feature_groups, preprocess_dataframe
+from scoring import DEFAULT_THRESHOLD, patient_result
+from startup import BackgroundModelLoader
+from validation import validate_batch
+
+
+DEFAULT_MODEL_PATH = "../Model/model.joblib"
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+class ValidationError(ValueError):
+
+    # Paciente recusado pela validação; reasons = códigos de validation.py
+
+    def __init__(self, reasons: str):
+        super().__init__(f"Paciente inválido: {reasons}")
+        self.reasons = reasons.split(";")
+
+
+# 1) Micro-batching
+
+class MicroBatcher:
+
+    # Fila de pacientes que é esvaziada em lotes de até `max_batch_size`,
+    # esperando no máximo `max_wait_ms` após a chegada do primeiro item do lote.
+
+    def __init__(self, model, max_batch_size: int = 64, max_wait_ms: float = 2.0, drift_monitor=None):
+        self.model = model
+        self.drift_monitor = drift_monitor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.feature_order = sum(get_feature_groups(), [])
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, patient: dict) -> float:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((patient, future))
+        return await future
+
+    def _predict(self, patients):
+
+        # Valida o micro-lote inteiro de uma vez; as posições rejeitadas voltam como
+        # ValidationError (as demais seguem para o modelo normalmente).
+
+        df = pd.DataFrame(patients, columns=self.feature_order)
+        validation = validate_batch(df)
+
+        results = [ValidationError(r) if r else None for r in validation.reasons]
+        if len(validation.accepted):
+            with instrumentation.stage("dataframe"):
+                X = preprocess_dataframe(validation.accepted)
+            probabilities = iter(self.model.predict_proba(X)[:, 1])
+            if self.drift_monitor is not None:
+                # Os dicts originais (só os aceitos): o monitor acumula e resume em blocos
+                with instrumentation.stage("drift"):
+                    self.drift_monitor.update_records([p for p, r in zip(patients, results) if r is None])
+            results = [r if r is not None else next(probabilities) for r in results]
+        return results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # Bloqueia até chegar o primeiro item; depois coleta até encher ou estourar o prazo
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            patients = [patient for patient, _ in batch]
+            try:
+                # O predict roda numa thread para o loop continuar aceitando conexões
+                results = await loop.run_in_executor(None, self._predict, patients)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, ValidationError):
+                    future.set_exception(result)
+                else:
+                    future.set_result(float(result))
+
+
+# 2) Servidor HTTP mínimo (HTTP/1.1 com keep-alive)
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+
+    # dict -> JSON; str -> texto puro (formato de exposição do Prometheus)
+
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+class ScoringServer:
+
+    def __init__(
+        self, model, max_batch_size: int = 64, max_wait_ms: float = 2.0, threshold: float = DEFAULT_THRESHOLD,
+        drift_monitor=None
+    ):
+        self.batcher = MicroBatcher(model, max_batch_size, max_wait_ms, drift_monitor)
+        self.threshold = threshold
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {
+                "status": "ok",
+                "max_batch_size": self.batcher.max_batch_size,
+                "max_wait_ms": self.batcher.max_wait * 1000.0
+            }
+
+        if method == "GET" and path == "/metrics":
+            registry = instrumentation.get_registry()
+            if registry is None:
+                return 404, {"error": "Métricas desligadas (defina LIGIA_METRICS=1)"}
+            return 200, registry.render_prometheus()
+
+        if method == "GET" and path == "/drift":
+            monitor = self.batcher.drift_monitor
+            if monitor is None:
+                return 404, {"error": "Monitor de drift desligado (defina LIGIA_DRIFT=1)"}
+            return 200, monitor.report()
+
+        if method == "GET" and path == "/shadow":
+            if not isinstance(self.batcher.model, ShadowScorer):
+                return 404, {"error": "Sem desafiantes (use --challenger)"}
+            return 200, self.batcher.model.snapshot()
+
+        if method == "POST" and path == "/predict":
+            try:
+                patient = json.loads(body)
+            except ValueError:
+                return 400, {"error": "JSON inválido"}
+            if not isinstance(patient, dict):
+                return 400, {"error": "O corpo deve ser um objeto JSON com as features do paciente"}
+
+            missing = [f for f in self.batcher.feature_order if f not in patient]
+            if missing:
+                return 400, {"error": f"Features ausentes: {missing}"}
+
+            try:
+                probability = await self.batcher.submit(patient)
+            except ValidationError as e:
+                return 400, {"error": str(e), "reasons": e.reasons}
+            return 200, patient_result(probability, self.threshold)
+
+        return 404, {"error": f"Rota não encontrada: {method} {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        self.batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Servidor de pontuação em http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.batcher.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP de pontuação com micro-batching.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="model.joblib ou diretório de artefato")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Limiar de decisão")
+    parser.add_argument(
+        "--challenger", action="append", default=[],
+        help="Modelo desafiante pontuado em sombra (repetível; a resposta continua sendo a do --model)"
+    )
+    args = parser.parse_args(argv)
+
+    # Carga + aquecimento antes de aceitar conexões (LIGIA_STARTUP_REPORT=1 mostra os tempos)
+    model = BackgroundModelLoader(args.model).start().result()
+    if args.challenger:
+        # Um só pré-processamento por lote para todos os modelos; scores de todos no log
+        model = load_shadow_scorer(model, args.challenger, args.threshold)
+
+    # Linha de log JSON periódica com o resumo das métricas (se LIGIA_METRICS=1)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    instrumentation.start_periodic_log(instrumentation.log_interval_from_env())
+    # Monitor de drift contra o drift_reference.json do modelo (se LIGIA_DRIFT=1)
+    monitor = drift.monitor_from_env(args.model)
+    server = ScoringServer(model, args.max_batch_size, args.max_wait_ms, args.threshold, monitor)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+# shadow.py
+# Responsável por:
+# - Pontuar o mesmo lote com vários modelos (campeão + desafiantes em modo sombra)
+# - Aplicar o ColumnTransformer ajustado (compilado, ver fast_preprocess.py) UMA vez
+#   por lote e entregar a mesma matriz a todos os boosters
+# - Registrar no log as probabilidades de todos os modelos e manter estatísticas
+#   acumuladas por modelo: latência, concordância do rótulo com o campeão e
+#   diferença absoluta de probabilidade
+
+# Obs.: o pré-processamento só é compartilhado entre modelos com o MESMO
+# pré-processador ajustado (medianas, médias/escalas e categorias idênticas, como num
+# retreino com os mesmos dados). Um desafiante treinado com outros dados tem outro
+# StandardScaler e ganha a sua própria passada; os modelos são agrupados por essa
+# "impressão digital", então cada pré-processador distinto roda uma vez por lote.
+
+# Com pré-processamento compartilhado, o custo da sombra é só o das árvores a mais.
+
+# A sombra nunca afeta a resposta do campeão. No predict_proba (caminho do servidor)
+# só o campeão roda na requisição; os desafiantes rodam depois, numa thread própria,
+# sobre a mesma matriz já transformada. Se eles ficarem para trás, lotes novos são
+# descartados da sombra (MAX_PENDING_BATCHES) em vez de acumular memória. Erro num
+# desafiante (ou no pré-processamento que só ele usa) vai para o log e para o
+# contador "errors" do modelo, e o lote não entra nas suas estatísticas.
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fast_preprocess import CompiledPreprocessor
+from instrumentation import SECONDS_BUCKETS, Histogram
+from scoring import DEFAULT_THRESHOLD
+
+
+logger = logging.getLogger("ligia.shadow")
+
+CHAMPION = "champion"
+MAX_PENDING_BATCHES = 64
+
+
+def _model_parts(model):
+
+    # (pré-processador compilado, probabilidade positiva a partir da matriz) para o
+    # pipeline joblib ou o ArtifactScorer (artifact.py). A transformação usa sempre o
+    # CompiledPreprocessor: mesma matriz float32 que o XGBoost recebe do sklearn
+    # (fast_preprocess.check_equivalence), sem o custo fixo do ColumnTransformer.
+
+    if hasattr(model, "named_steps"):
+        classifier = model.named_steps["model"]
+        return CompiledPreprocessor.from_pipeline(model), lambda X: classifier.predict_proba(X)[:, 1]
+    return model.preprocessor, model.booster.inplace_predict
+
+
+class _ModelStats:
+
+    # Contadores acumulados de um modelo; a comparação é sempre contra o campeão.
+
+    def __init__(self):
+        self.rows = 0
+        self.seconds = Histogram(SECONDS_BUCKETS)
+        self.agree = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, probabilities, labels, champion_probabilities, champion_labels):
+        diff = np.abs(probabilities - champion_probabilities)
+        self.rows += len(probabilities)
+        self.seconds.observe(seconds)
+        self.agree += int((labels == champion_labels).sum())
+        self.abs_diff_sum += float(diff.sum())
+        self.max_abs_diff = max(self.max_abs_diff, float(diff.max(initial=0.0)))
+
+    def snapshot(self) -> dict:
+        return {
+            "rows": self.rows,
+            "calls": self.seconds.count,
+            "mean_ms": 1000.0 * self.seconds.sum / self.seconds.count if self.seconds.count else 0.0,
+            "p99_ms": 1000.0 * self.seconds.quantile(0.99),
+            "agreement": self.agree / self.rows if self.rows else 1.0,
+            "mean_abs_diff": self.abs_diff_sum / self.rows if self.rows else 0.0,
+            "max_abs_diff": self.max_abs_diff,
+            "errors": self.errors
+        }
+
+
+class ShadowScorer:
+
+    # Substituto do modelo campeão (mesma interface predict_proba/predict): quem
+    # chama recebe só as probabilidades do campeão; os desafiantes rodam em sombra.
+
+    def __init__(self, models: dict, champion: str = CHAMPION, threshold: float = DEFAULT_THRESHOLD):
+        if champion not in models:
+            raise ValueError(f"Campeão '{champion}' não está entre os modelos: {list(models)}")
+
+        self.names = list(models)
+        self.champion = champion
+        self.threshold = threshold
+
+        # impressão digital do pré-processador -> (pré-processador, modelos que o compartilham)
+        self._groups = {}
+        self._predict = {}
+        for name, model in models.items():
+            preprocessor, predict = _model_parts(model)
+            fingerprint = json.dumps(preprocessor.to_dict(), sort_keys=True)
+            self._groups.setdefault(fingerprint, (preprocessor, []))[1].append(name)
+            self._predict[name] = predict
+
+        self._lock = threading.Lock()
+        self._preprocess_seconds = Histogram(SECONDS_BUCKETS)
+        self._stats = {name: _ModelStats() for name in self.names}
+        self._skipped_batches = 0
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    @property
+    def preprocess_passes(self) -> int:
+        return len(self._groups)
+
+    # 1) Pontuação
+
+    def _score(self, X, names, matrices):
+
+        # Pontua `names` reaproveitando as matrizes já transformadas (impressão digital
+        # -> matriz). Erros do campeão sobem; os de desafiantes são registrados e o
+        # modelo sai do resultado. Retorna (scores, segundos, segundos de pré-proc.).
+
+        scores = {}
+        seconds = {}
+        preprocess_seconds = 0.0
+
+        for fingerprint, (preprocessor, group) in self._groups.items():
+            group = [name for name in group if name in names]
+            if not group:
+                continue
+
+            if fingerprint not in matrices:
+                start = time.perf_counter()
+                try:
+                    matrices[fingerprint] = preprocessor.transform_columns(X)
+                except Exception:
+                    if self.champion in group:
+                        raise
+                    self._failed(group, "pré-processamento")
+                    continue
+                preprocess_seconds += time.perf_counter() - start
+
+            for name in group:
+                start = time.perf_counter()
+                try:
+                    scores[name] = np.asarray(self._predict[name](matrices[fingerprint]), dtype=np.float64)
+                except Exception:
+                    if name == self.champion:
+                        raise
+                    self._failed([name], "predict")
+                    continue
+                seconds[name] = time.perf_counter() - start
+
+        return scores, seconds, preprocess_seconds
+
+    def _failed(self, names, step):
+        logger.exception("Desafiante(s) %s falharam no %s; lote fora da sombra", names, step)
+        with self._lock:
+            for name in names:
+                self._stats[name].errors += 1
+
+    def _finish(self, X, scores, seconds, preprocess_seconds):
+
+        # Estatísticas + log de um lote já pontuado (modelos que falharam ficam de fora).
+
+        self._record(scores, seconds, preprocess_seconds)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "shadow_scores",
+                "rows": len(X),
+                "scores": {name: scores[name].tolist() if name in scores else None for name in self.names}
+            }))
+
+    def score_all(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Probabilidade da classe positiva de cada modelo para um lote já tratado por
+        preprocess_dataframe, tudo na thread de quem chama. Retorna um DataFrame (uma
+        coluna por modelo, NaN para desafiantes que falharam) alinhado ao índice de X;
+        também atualiza as estatísticas e registra os scores no log.
+        """
+
+        scores, seconds, preprocess_seconds = self._score(X, set(self.names), {})
+        self._finish(X, scores, seconds, preprocess_seconds)
+        return pd.DataFrame(scores, index=X.index).reindex(columns=self.names)
+
+    def _shadow(self, X, champion_scores, matrices, champion_seconds, champion_preprocess_seconds):
+        try:
+            challengers = set(self.names) - {self.champion}
+            scores, seconds, preprocess_seconds = self._score(X, challengers, matrices)
+            scores[self.champion] = champion_scores
+            seconds[self.champion] = champion_seconds
+            self._finish(X, scores, seconds, champion_preprocess_seconds + preprocess_seconds)
+        except Exception:
+            logger.exception("Falha na pontuação em sombra")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _record(self, scores, seconds, preprocess_seconds):
+        champion = scores[self.champion]
+        champion_labels = champion >= self.threshold
+        with self._lock:
+            self._preprocess_seconds.observe(preprocess_seconds)
+            for name in scores:
+                self._stats[name].observe(
+                    seconds[name], scores[name], scores[name] >= self.threshold, champion, champion_labels
+                )
+
+    # 2) Interface do modelo (caminho da requisição: só o campeão)
+
+    def predict_proba(self, X) -> np.ndarray:
+        matrices = {}
+        scores, seconds, preprocess_seconds = self._score(X, {self.champion}, matrices)
+        positive = scores[self.champion]
+
+        with self._lock:
+            queued = self._pending < MAX_PENDING_BATCHES
+            if queued:
+                self._pending += 1
+            else:
+                self._skipped_batches += 1
+        if queued:
+            self._executor.submit(
+                self._shadow, X, positive, matrices, seconds[self.champion], preprocess_seconds
+            )
+
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] >= self.threshold).astype(np.int64)
+
+    def flush(self):
+
+        # Espera a sombra dos lotes já enviados (a thread única processa em ordem).
+
+        self._executor.submit(lambda: None).result()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "champion": self.champion,
+                "threshold": self.threshold,
+                "preprocess_passes": self.preprocess_passes,
+                "preprocess_mean_ms": (
+                    1000.0 * self._preprocess_seconds.sum / self._preprocess_seconds.count
+                    if self._preprocess_seconds.count else 0.0
+                ),
+                "pending_batches": self._pending,
+                "skipped_batches": self._skipped_batches,
+                "models": {name: stats.snapshot() for name, stats in self._stats.items()}
+            }
+
+
+def load_shadow_scorer(champion_model, challenger_paths, threshold: float = DEFAULT_THRESHOLD) -> ShadowScorer:
+
+    # Campeão já carregado (ex.: pelo BackgroundModelLoader) + desafiantes por caminho
+    # (model.joblib ou diretório de artefato), nomeados challenger_1, challenger_2, ...
+
+    from startup import load_model
+
+    models = {CHAMPION: champion_model}
+    for i, path in enumerate(challenger_paths, start=1):
+        models[f"challenger_{i}"] = load_model(path)
+    return ShadowScorer(models, CHAMPION, threshold)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import timeit
+
+    import joblib
+
+    from artifact import export_artifact, load_artifact
+    from preprocessing import preprocess_dataframe
+
+    pipeline = joblib.load("../Model/model.joblib")
+    X = preprocess_dataframe(pd.read_csv("../Data/X_test (1).csv"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Desafiante = o mesmo modelo (pipeline e artefato): mesmo pré-processador,
+        # então deve concordar 100% e compartilhar a passada de pré-processamento
+        challenger = load_artifact(export_artifact(pipeline, tmp))
+        scorer = ShadowScorer({CHAMPION: pipeline, "challenger_1": joblib.load("../Model/model.joblib"), "challenger_2": challenger})
+        print(f"passadas de pré-processamento: {scorer.preprocess_passes}")
+
+        expected = pipeline.predict_proba(X)[:, 1]
+        print(f"igual ao pipeline: {np.array_equal(scorer.score_all(X)[CHAMPION].to_numpy(), expected)}")
+
+        for n_rows in (1, len(X)):
+            batch = X.iloc[:n_rows]
+            t_one = timeit.timeit(lambda: pipeline.predict_proba(batch), number=200) / 200
+            t_three = timeit.timeit(lambda: [pipeline.predict_proba(batch) for _ in range(3)], number=200) / 200
+            t_shadow = timeit.timeit(lambda: scorer.score_all(batch), number=200) / 200
+            print(
+                f"{n_rows} linha(s): só campeão {t_one * 1e3:.2f} ms | 3 pipelines {t_three * 1e3:.2f} ms | "
+                f"sombra (3 modelos) {t_shadow * 1e3:.2f} ms"
+            )
+
+        print(json.dumps(scorer.snapshot(), indent=2))
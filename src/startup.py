@@ -0,0 +1,233 @@
+# startup.py
+# Responsável por:
+# - Configurar a inicialização por variáveis de ambiente (modo headless, sem input())
+# - Carregar e aquecer o modelo em segundo plano (thread), com um lote fictício
+# - Medir o tempo de inicialização por import e por fase de carga
+
+# Variáveis de ambiente:
+# - LIGIA_HEADLESS=1          nunca pergunta nada no terminal (containers/CI)
+# - LIGIA_MODEL_PATH=...      caminho do model.joblib ou de um diretório de artefato
+# - LIGIA_WARMUP_ROWS=64      linhas do lote de aquecimento (0 desliga)
+# - LIGIA_STARTUP_REPORT=1    imprime o relatório de tempos ao final da carga
+# - LIGIA_TREE_BACKEND=numpy  avalia as árvores do artefato sem o xgboost (numpy_trees.py)
+
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Paciente usado no aquecimento (o mesmo do botão "Paciente Saudável" do dashboard)
+WARMUP_PATIENT = {
+    "Age": 35,
+    "Sex": "M",
+    "ChestPainType": "NAP",
+    "RestingBP": 115,
+    "Cholesterol": 180,
+    "FastingBS": 0,
+    "RestingECG": "Normal",
+    "MaxHR": 165,
+    "ExerciseAngina": "N",
+    "Oldpeak": 0.5,
+    "ST_Slope": "Up"
+}
+
+# Imports medidos individualmente durante a carga do modelo (em ordem de dependência).
+# O artefato sem pickle (artifact.py) não precisa do sklearn nem do joblib.
+PIPELINE_IMPORTS = ("numpy", "pandas", "sklearn", "xgboost", "joblib")
+ARTIFACT_IMPORTS = ("numpy", "pandas", "xgboost")
+NUMPY_BACKEND_IMPORTS = ("numpy", "pandas")
+
+
+# 1) Configuração por ambiente
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on", "s", "sim")
+
+
+def headless_mode() -> bool:
+    return env_flag("LIGIA_HEADLESS")
+
+
+def model_path_from_env():
+    return os.environ.get("LIGIA_MODEL_PATH") or None
+
+
+def tree_backend_from_env() -> str:
+    return os.environ.get("LIGIA_TREE_BACKEND", "xgboost").strip().lower()
+
+
+def warmup_rows_from_env(default: int = 64) -> int:
+    return int(os.environ.get("LIGIA_WARMUP_ROWS", default))
+
+
+# 2) Medição de tempos
+
+def _seconds_since_process_start():
+
+    # Idade do processo (Linux, via /proc); None onde não houver essa informação.
+
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupTimer:
+
+    # Registra (fase, segundos) de forma thread-safe; o relatório sai em ordem de execução.
+    # O que aconteceu antes deste módulo ser importado (interpretador e, no dashboard,
+    # o import do streamlit feito pelo `streamlit run`) aparece como uma fase própria,
+    # e módulos que já estavam carregados são listados em vez de sumirem do relatório.
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.before_start = _seconds_since_process_start()
+        self.phases = []
+        self.preloaded = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def mark_preloaded(self, name: str):
+        with self._lock:
+            if name not in self.preloaded:
+                self.preloaded.append(name)
+
+    def report(self) -> str:
+        with self._lock:
+            phases = list(self.phases)
+            preloaded = list(self.preloaded)
+        total = time.perf_counter() - self.started_at
+        if self.before_start is not None:
+            phases.insert(0, ("antes do startup.py", self.before_start))
+            total += self.before_start
+        width = max([len(name) for name, _ in phases] + [5])
+
+        lines = ["Tempo de inicialização:"]
+        lines += [f"  {name:<{width}}  {seconds * 1000:8.1f} ms" for name, seconds in phases]
+        lines.append(f"  {'total':<{width}}  {total * 1000:8.1f} ms")
+        if preloaded:
+            lines.append(f"  já carregados antes da medição: {', '.join(preloaded)}")
+        return "\n".join(lines)
+
+
+# Um cronômetro por processo, iniciado no primeiro import deste módulo
+STARTUP_TIMER = StartupTimer()
+
+
+# 3) Imports medidos
+
+def timed_import(name: str, timer: StartupTimer = STARTUP_TIMER):
+
+    # Importa registrando o tempo. Módulos já carregados (por outro import ou antes
+    # do cronômetro) não têm tempo a medir: entram na lista "já carregados".
+
+    if name in sys.modules:
+        timer.mark_preloaded(name)
+        return sys.modules[name]
+    with timer.phase(f"import {name}"):
+        return importlib.import_module(name)
+
+
+# 4) Carga do modelo em segundo plano
+
+def load_model(model_path: str):
+
+    # Diretório -> artefato sem pickle (artifact.py); arquivo -> pipeline joblib.
+
+    if os.path.isdir(model_path):
+        from artifact import load_artifact
+        return load_artifact(model_path, backend=tree_backend_from_env())
+
+    import joblib
+    return joblib.load(model_path)
+
+
+class BackgroundModelLoader:
+
+    # Importa as dependências pesadas, carrega e aquece o modelo em uma thread.
+    # result() bloqueia até o modelo ficar pronto (ou relança o erro da carga).
+
+    def __init__(self, model_path, warmup_rows: int = None, timer: StartupTimer = STARTUP_TIMER):
+        self.model_path = model_path
+        self.warmup_rows = warmup_rows_from_env() if warmup_rows is None else warmup_rows
+        self.timer = timer
+        self._model = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: float = None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Modelo não ficou pronto em {timeout} s")
+        if self._error is not None:
+            raise self._error
+        return self._model
+
+    def _run(self):
+        try:
+            if not self.model_path or not os.path.exists(self.model_path):
+                raise FileNotFoundError("Não foi possível localizar 'model.joblib' nas pastas padrão.")
+
+            if not os.path.isdir(self.model_path):
+                imports = PIPELINE_IMPORTS
+            elif tree_backend_from_env() == "numpy":
+                imports = NUMPY_BACKEND_IMPORTS
+            else:
+                imports = ARTIFACT_IMPORTS
+            for name in imports:
+                timed_import(name, self.timer)
+
+            with self.timer.phase("carga do modelo"):
+                model = load_model(self.model_path)
+
+            if self.warmup_rows > 0:
+                with self.timer.phase(f"aquecimento ({self.warmup_rows} linhas)"):
+                    self._warmup(model)
+
+            # LIGIA_METRICS=1: mede as etapas a partir daqui (instrumentation.py)
+            from instrumentation import instrument_if_enabled
+            self._model = instrument_if_enabled(model)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+            if env_flag("LIGIA_STARTUP_REPORT"):
+                print(self.timer.report(), flush=True)
+
+    def _warmup(self, model):
+
+        # A primeira chamada paga custos únicos (alocação de threads do XGBoost,
+        # validações do sklearn); fazemos isso antes da primeira requisição real.
+
+        import pandas as pd
+        from preprocessing import preprocess_dataframe
+
+        df = pd.DataFrame([WARMUP_PATIENT] * self.warmup_rows)
+        model.predict_proba(preprocess_dataframe(df))
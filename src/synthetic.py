@@ -0,0 +1,166 @@
+# synthetic.py
+# Responsável por:
+# - Aprender, a partir do heart.csv, a distribuição das 11 features condicionada à classe:
+#   * numéricas: CDF empírica (quantis) + taxa de zeros inválidos em RestingBP/Cholesterol
+#     (as mesmas anomalias que o preprocess_dataframe trata)
+#   * categóricas: frequência de cada categoria
+# - Gerar dezenas de milhões de pacientes realistas com amostragem NumPy vetorizada
+# - Gravar em blocos (CSV ou Parquet), de forma determinística dada a semente
+
+# Obs.: as features são amostradas independentemente DENTRO de cada classe (estilo
+# naive Bayes). Isso preserva as marginais e a relação de cada feature com o alvo,
+# que é o que importa para testes de carga, benchmarks e treino out-of-core.
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from batch_score import ChunkWriter
+from preprocessing import INVALID_ZERO_FEATURES, get_feature_groups, load_data
+
+
+DEFAULT_DATA_PATH = "../Data/heart.csv"
+N_QUANTILES = 201
+TARGET = "HeartDisease"
+
+
+# 1) Perfil das distribuições
+
+def fit_profile(df: pd.DataFrame, target: str = TARGET) -> dict:
+    num_features, cat_features = get_feature_groups()
+    grid = np.linspace(0.0, 1.0, N_QUANTILES)
+
+    profile = {
+        "columns": list(df.columns),
+        "class_prior": float(df[target].mean()),
+        # Pelo valor, não pelo dtype (a leitura tipada guarda inteiros em float32)
+        "integer_features": [f for f in num_features if np.all(np.mod(df[f].dropna(), 1) == 0)],
+        "classes": {}
+    }
+
+    for label, group in df.groupby(target):
+        numeric = {}
+        for f in num_features:
+            values = group[f].to_numpy(dtype=np.float64)
+            zero_rate = 0.0
+            if f in INVALID_ZERO_FEATURES:
+                zero_rate = float(np.mean(values == 0))
+                values = values[values != 0]
+            numeric[f] = {"zero_rate": zero_rate, "quantiles": np.quantile(values, grid).tolist()}
+
+        categorical = {}
+        for f in cat_features:
+            freq = group[f].value_counts(normalize=True).sort_index()
+            categorical[f] = {
+                "values": [v.item() if hasattr(v, "item") else v for v in freq.index],
+                "probs": freq.to_numpy().tolist()
+            }
+
+        profile["classes"][str(int(label))] = {"numeric": numeric, "categorical": categorical}
+
+    return profile
+
+
+def fit_profile_from_csv(path: str = DEFAULT_DATA_PATH) -> dict:
+    return fit_profile(load_data(path))
+
+
+# 2) Amostragem vetorizada
+
+def _sample_class(class_profile: dict, n: int, rng, integer_features) -> dict:
+    grid = np.linspace(0.0, 1.0, N_QUANTILES)
+    columns = {}
+
+    for f, spec in class_profile["numeric"].items():
+        # Inverse-CDF: quantil uniforme interpolado nos quantis empíricos
+        values = np.interp(rng.random(n), grid, spec["quantiles"])
+        if spec["zero_rate"] > 0:
+            values[rng.random(n) < spec["zero_rate"]] = 0.0
+        columns[f] = np.rint(values).astype(np.int64) if f in integer_features else np.round(values, 1)
+
+    for f, spec in class_profile["categorical"].items():
+        values = np.asarray(spec["values"], dtype=object)
+        columns[f] = values[rng.choice(len(values), size=n, p=spec["probs"])]
+
+    return columns
+
+
+def generate(profile: dict, n_rows: int, seed: int = 42, include_target: bool = True) -> pd.DataFrame:
+
+    # Gera n_rows pacientes; mesma semente -> mesmo DataFrame.
+
+    rng = np.random.default_rng(seed)
+    labels = (rng.random(n_rows) < profile["class_prior"]).astype(np.int64)
+
+    out = {}
+    for label in (0, 1):
+        mask = labels == label
+        sampled = _sample_class(profile["classes"][str(label)], int(mask.sum()), rng, profile["integer_features"])
+        for f, values in sampled.items():
+            if f not in out:
+                out[f] = np.empty(n_rows, dtype=values.dtype)
+            out[f][mask] = values
+
+    out[TARGET] = labels
+    columns = [c for c in profile["columns"] if include_target or c != TARGET]
+    return pd.DataFrame(out)[columns]
+
+
+def iter_synthetic_chunks(profile: dict, n_rows: int, chunk_size: int = 1_000_000, seed: int = 42, include_target: bool = True):
+
+    # Cada bloco usa a semente (seed, índice do bloco): determinístico e sem estado
+    # compartilhado, então blocos podem ser gerados em qualquer ordem.
+
+    for i, start in enumerate(range(0, n_rows, chunk_size)):
+        n = min(chunk_size, n_rows - start)
+        yield generate(profile, n, seed=[seed, i], include_target=include_target)
+
+
+def write_synthetic(
+    out_path: str,
+    n_rows: int,
+    profile: dict = None,
+    chunk_size: int = 1_000_000,
+    seed: int = 42,
+    include_target: bool = True
+) -> Path:
+    """
+    Grava n_rows pacientes sintéticos em out_path (CSV ou Parquet, pela extensão),
+    bloco a bloco, com memória limitada pelo chunk_size.
+    """
+
+    profile = profile or fit_profile_from_csv()
+    writer = ChunkWriter(out_path)
+    try:
+        for chunk in iter_synthetic_chunks(profile, n_rows, chunk_size, seed, include_target):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    return Path(out_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerador de pacientes sintéticos.")
+    parser.add_argument("output", help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--source", default=DEFAULT_DATA_PATH, help="Base usada para aprender as distribuições")
+    parser.add_argument("--no-target", action="store_true", help="Não inclui a coluna HeartDisease")
+    parser.add_argument("--save-profile", default=None, help="Salva o perfil aprendido em JSON")
+    args = parser.parse_args(argv)
+
+    profile = fit_profile_from_csv(args.source)
+    if args.save_profile:
+        with open(args.save_profile, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=2)
+
+    path = write_synthetic(args.output, args.rows, profile, args.chunk_size, args.seed, not args.no_target)
+    print(f"{args.rows} linhas sintéticas em: {path.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
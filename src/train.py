@@ -4,6 +4,10 @@
 # - Treinar o modelo final escolhido
 # - Organizar o pipeline (preprocessador + modelo)
 # - Salvar o modelo treinado em formato .joblib
+# - Exportar também um artefato versionado sem pickle (ver artifact.py)
+# - Salvar o perfil de referência para monitoramento de drift (ver drift.py)
+# - Avaliar no conjunto de teste (curvas, limiar para o recall alvo, ICs por
+#   bootstrap) e gravar o relatório junto do artefato (ver evaluation.py)
 # - Deixar o código simples e reprodutível
 
 from pathlib import Path
@@ -13,40 +17,76 @@ from sklearn.pipeline import Pipeline
 
 # Importa a função de preparação dos dados
 from preprocessing import prepare_data
+from artifact import export_artifact
+from drift import REFERENCE_FILE, build_reference, save_reference
+from evaluation import DEFAULT_RECALL_TARGET, evaluation_report, format_summary, save_report
+
+
+# Configuração padrão do XGBoost (sobrescrita pelo modo de tuning, ver tuning.py)
+DEFAULT_MODEL_PARAMS = {
+    "random_state": 42,
+    "eval_metric": "logloss",
+    "n_estimators": 200,
+    "learning_rate": 0.05,
+    "max_depth": 5,
+    "subsample": 0.9,
+    "colsample_bytree": 0.9,
+    "n_jobs": -1
+}
 
 
 def train_and_save_model(
     data_path: str,
-    save_path: str = "../Model/model.joblib"
+    save_path: str = "../Model/model.joblib",
+    artifact_dir: str = "../Model/artifact",
+    model_params: dict = None,
+    cache_dir: str = None,
+    recall_target: float = DEFAULT_RECALL_TARGET
 ) -> Path:
     """
     Treina um pipeline (preprocessador + modelo) e salva em .joblib.
+    model_params sobrescreve parâmetros de DEFAULT_MODEL_PARAMS.
+    Se cache_dir for informado, usa as matrizes já transformadas do cache em disco
+    (matrix_cache.py) em vez de reler e reprocessar o CSV.
+    Se artifact_dir não for None, exporta também o artefato versionado
+    (booster nativo + pré-processamento em JSON + manifest).
+    O relatório de avaliação no teste (evaluation.json, com o limiar que atinge
+    recall_target) vai para o artefato, ou para a pasta do .joblib sem artefato.
     Retorna o caminho final do arquivo salvo.
     """
 
-    # 1) Carregamento dos dados já divididos e com pré-processador
-    X_train, X_test, y_train, y_test, preprocessor = prepare_data(data_path)
-
-    # 2) Define o modelo final escolhido (XGBoost)
-    model = XGBClassifier(
-        random_state=42,
-        eval_metric="logloss",
-        n_estimators=200,
-        learning_rate=0.05,
-        max_depth=5,
-        subsample=0.9,
-        colsample_bytree=0.9,
-        n_jobs=-1
-    )
+    # 1) Define o modelo final escolhido (XGBoost)
+    model = XGBClassifier(**{**DEFAULT_MODEL_PARAMS, **(model_params or {})})
 
-    # 3) Monta pipeline completo (pré-processamento + modelo)
-    pipeline = Pipeline(steps=[
-        ("preprocess", preprocessor),
-        ("model", model)
-    ])
+    if cache_dir is None:
+        # 2) Carregamento dos dados já divididos e com pré-processador
+        X_train, X_test, y_train, y_test, preprocessor = prepare_data(data_path)
 
-    # 4) Treinamento do pipeline
-    pipeline.fit(X_train, y_train)
+        # 3) Monta pipeline completo (pré-processamento + modelo)
+        pipeline = Pipeline(steps=[
+            ("preprocess", preprocessor),
+            ("model", model)
+        ])
+
+        # 4) Treinamento do pipeline
+        pipeline.fit(X_train, y_train)
+        X_test_transformed = pipeline.named_steps["preprocess"].transform(X_test)
+        reference = build_reference(X_train)
+    else:
+        # 2-4) Matrizes transformadas + pré-processador ajustado vêm do cache;
+        # treinar só o modelo equivale ao pipeline.fit (mesmo fit_transform no treino)
+        from matrix_cache import load_cached_reference, load_or_build_matrices
+
+        X_train, X_test_transformed, y_train, y_test, preprocessor = load_or_build_matrices(
+            data_path, cache_dir
+        )
+        model.fit(X_train, y_train)
+        pipeline = Pipeline(steps=[
+            ("preprocess", preprocessor),
+            ("model", model)
+        ])
+        # O perfil precisa dos valores brutos: foi calculado junto com as matrizes
+        reference = load_cached_reference(data_path, cache_dir)
 
     # 5) Garante que a pasta de destino existe e salva em .joblib
     save_path = Path(save_path)
@@ -54,12 +94,56 @@ def train_and_save_model(
     joblib.dump(pipeline, save_path)
 
     print(f"Modelo salvo em: {save_path.resolve()}")
+
+    # 5.1) Perfil de referência do treino para o monitor de drift (server/batch_score)
+    save_reference(reference, save_path.parent / REFERENCE_FILE)
+
+    # 6) Avaliação no conjunto de teste: uma passada de predição, o resto sai das curvas
+    proba_test = model.predict_proba(X_test_transformed)[:, 1]
+    report = evaluation_report(y_test, proba_test, recall_target=recall_target)
+    print(format_summary(report))
+    metrics = {
+        "accuracy": report["at_threshold"]["accuracy"],
+        "recall": report["at_threshold"]["recall"],
+        "roc_auc": report["roc_auc"]
+    }
+
+    # 7) Exporta o artefato versionado, com métricas e relatório do conjunto de teste
+    if artifact_dir is not None:
+        artifact_path = export_artifact(pipeline, artifact_dir, data_path=data_path, metrics=metrics)
+        save_reference(reference, artifact_path / REFERENCE_FILE)
+        save_report(report, artifact_path)
+        print(f"Artefato exportado em: {artifact_path.resolve()}")
+    else:
+        save_report(report, save_path.parent)
+
     return save_path
 
 
 if __name__ == "__main__":
-    # Caminho do dataset bruto
-    data_path = "../Data/heart.csv"
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Treina e salva o pipeline.")
+    parser.add_argument("--data", default="../Data/heart.csv", help="Caminho do dataset bruto")
+    parser.add_argument("--tune", action="store_true", help="Busca de hiperparâmetros antes do treino")
+    parser.add_argument("--budget", type=float, default=300.0, help="Tempo máximo do tuning (s)")
+    parser.add_argument("--jobs", type=int, default=-1, help="Processos do tuning (-1 = todos os núcleos)")
+    parser.add_argument("--cache-dir", default=None, help="Cache de matrizes pré-processadas (ex.: ../Data/.cache)")
+    parser.add_argument(
+        "--recall-target", type=float, default=DEFAULT_RECALL_TARGET,
+        help="Recall alvo do relatório de avaliação (limiar sugerido)"
+    )
+    args = parser.parse_args()
 
-    # Executa o treinamento e salva o modelo
-    train_and_save_model(data_path)
+    if args.tune:
+        from tuning import tune_and_save_model
+        tune_and_save_model(
+            args.data,
+            cache_dir=args.cache_dir,
+            recall_target=args.recall_target,
+            time_budget=args.budget,
+            n_jobs=args.jobs
+        )
+    else:
+        # Executa o treinamento e salva o modelo
+        train_and_save_model(args.data, cache_dir=args.cache_dir, recall_target=args.recall_target)
@@ -0,0 +1,205 @@
+# train_out_of_core.py
+# Responsável por:
+# - Treinar o XGBoost em bases maiores que a memória, lendo o CSV em blocos
+# - 1ª passada: ajustar o pré-processamento em streaming (preprocessing.fit_streaming_preprocessor)
+# - 2ª passada: alimentar blocos já transformados em um DMatrix de memória externa
+#   (xgboost.DataIter + ExtMemQuantileDMatrix), com páginas em cache no disco
+# - Avaliar no holdout (também em streaming) e salvar como artefato (artifact.py),
+#   com o relatório de avaliação (evaluation.json, ver evaluation.py)
+
+# Obs.: no treino, o pico de memória fica limitado ao tamanho do bloco (mais as páginas
+# quantizadas que o XGBoost mantém). A avaliação é a exceção: o relatório de
+# evaluation.py (curvas, ICs por bootstrap) precisa de todos os scores do holdout,
+# então ela guarda um float32 + um int8 por linha de holdout, ou seja, O(linhas de
+# holdout): ~5 bytes por linha, ~1 GB para 200 milhões de linhas de holdout.
+# O resultado é um diretório de artefato, que o dashboard, o server.py e o
+# PredictionCache já sabem carregar (LIGIA_MODEL_PATH=<diretório>).
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import xgboost as xgb
+
+from artifact import write_artifact
+from evaluation import evaluation_report, format_summary, save_report
+from fast_preprocess import CompiledPreprocessor
+from preprocessing import fit_streaming_preprocessor, holdout_mask, iter_data_chunks
+from train import DEFAULT_MODEL_PARAMS
+
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# Nomes do XGBClassifier que mudam na API nativa
+_NATIVE_NAMES = {
+    "learning_rate": "eta",
+    "random_state": "seed",
+    "reg_lambda": "lambda",
+    "reg_alpha": "alpha"
+}
+
+# Parâmetros do booster com o mesmo nome nas duas APIs
+_SHARED_PARAMS = {
+    "objective", "eval_metric", "tree_method", "max_depth", "max_leaves", "max_bin", "grow_policy",
+    "subsample", "sampling_method", "colsample_bytree", "colsample_bylevel", "colsample_bynode",
+    "min_child_weight", "gamma", "max_delta_step", "scale_pos_weight", "base_score",
+    "monotone_constraints", "interaction_constraints", "num_parallel_tree", "max_cat_to_onehot",
+    "max_cat_threshold", "multi_strategy", "device", "verbosity", "validate_parameters"
+}
+
+# Só do wrapper sklearn (n_estimators vira num_boost_round em train_out_of_core)
+_WRAPPER_ONLY = {
+    "n_estimators", "n_jobs", "missing", "enable_categorical", "feature_types", "feature_weights",
+    "importance_type", "callbacks", "early_stopping_rounds", "booster"
+}
+
+
+def booster_params(model_params: dict = None) -> dict:
+
+    # Traduz os parâmetros do XGBClassifier (train.py, tuning.py) para a API nativa
+    # xgb.train. Chave desconhecida é erro: ignorá-la treinaria um modelo diferente
+    # do treino em memória com a mesma configuração.
+
+    params = {**DEFAULT_MODEL_PARAMS, **(model_params or {})}
+    unknown = sorted(set(params) - set(_NATIVE_NAMES) - _SHARED_PARAMS - _WRAPPER_ONLY)
+    if unknown:
+        raise ValueError(f"Parâmetros sem equivalente no treino out-of-core: {unknown}")
+    if params.get("booster") not in (None, "gbtree"):
+        raise ValueError(f"Só o booster gbtree é suportado (recebido {params['booster']})")
+
+    native = {"objective": "binary:logistic", "tree_method": "hist"}
+    for key, value in params.items():
+        if value is None or key in _WRAPPER_ONLY:
+            continue
+        native[_NATIVE_NAMES.get(key, key)] = value
+
+    n_jobs = params.get("n_jobs", -1)
+    native["nthread"] = os.cpu_count() if n_jobs is None or n_jobs < 1 else n_jobs
+    return native
+
+
+class ChunkedTrainingIter(xgb.DataIter):
+
+    # Entrega ao XGBoost as linhas de TREINO de cada bloco, já transformadas.
+
+    def __init__(self, path, preprocessor, chunk_size, target, test_size, random_state, cache_prefix):
+        self.path = path
+        self.preprocessor = preprocessor
+        self.chunk_size = chunk_size
+        self.target = target
+        self.test_size = test_size
+        self.random_state = random_state
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._chunks = enumerate(iter_data_chunks(self.path, self.chunk_size))
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self.reset()
+
+        for i, chunk in self._chunks:
+            train = chunk[~holdout_mask(i, len(chunk), self.test_size, self.random_state)]
+            if len(train) == 0:
+                continue
+            input_data(
+                data=self.preprocessor.transform_columns(train),
+                label=train[self.target].to_numpy(dtype=np.float32)
+            )
+            return True
+        return False
+
+
+def evaluate_holdout(booster, preprocessor, path, chunk_size, target, test_size, random_state):
+
+    # Passada de avaliação: só as linhas de holdout (as mesmas excluídas do treino).
+    # Retorna (métricas para o manifest, relatório completo de evaluation.py); as
+    # métricas saem do próprio relatório, sem reordenar os scores de novo.
+    # Memória: O(linhas de holdout), ~5 bytes por linha (ver o cabeçalho).
+
+    probabilities, labels = [], []
+    for i, chunk in enumerate(iter_data_chunks(path, chunk_size)):
+        test = chunk[holdout_mask(i, len(chunk), test_size, random_state)]
+        if len(test) == 0:
+            continue
+        probabilities.append(booster.inplace_predict(preprocessor.transform_columns(test)).astype(np.float32))
+        labels.append(test[target].to_numpy(dtype=np.int8))
+
+    report = evaluation_report(np.concatenate(labels), np.concatenate(probabilities))
+    metrics = {
+        "accuracy": report["at_threshold"]["accuracy"],
+        "recall": report["at_threshold"]["recall"],
+        "roc_auc": report["roc_auc"],
+        "holdout_rows": report["rows"]
+    }
+    return metrics, report
+
+
+def train_out_of_core(
+    data_path: str,
+    artifact_dir: str = "../Model/artifact",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    model_params: dict = None,
+    target: str = "HeartDisease",
+    test_size: float = 0.2,
+    random_state: int = 42,
+    cache_dir: str = None
+):
+    """
+    Treino em duas passadas sobre o CSV, com memória limitada pelo chunk_size
+    (a avaliação guarda ~5 bytes por linha de holdout, ver evaluate_holdout).
+    Retorna (caminho do artefato, métricas do holdout).
+    """
+
+    params = {**DEFAULT_MODEL_PARAMS, **(model_params or {})}
+    timings = {}
+
+    # 1ª passada: estatísticas do pré-processamento (só linhas de treino)
+    start = time.perf_counter()
+    preprocessor = CompiledPreprocessor.from_dict(
+        fit_streaming_preprocessor(data_path, chunk_size, target, test_size, random_state)
+    )
+    timings["fit_preprocessor_s"] = time.perf_counter() - start
+
+    # 2ª passada: DMatrix de memória externa + treino
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        data_iter = ChunkedTrainingIter(
+            data_path, preprocessor, chunk_size, target, test_size, random_state,
+            cache_prefix=os.path.join(tmp, "xgb-cache")
+        )
+        dtrain = xgb.ExtMemQuantileDMatrix(data_iter, missing=np.nan)
+        booster = xgb.train(booster_params(params), dtrain, num_boost_round=params["n_estimators"])
+        del dtrain
+    timings["train_s"] = time.perf_counter() - start
+
+    # Avaliação no holdout (3ª leitura, também em blocos)
+    start = time.perf_counter()
+    metrics, report = evaluate_holdout(booster, preprocessor, data_path, chunk_size, target, test_size, random_state)
+    timings["evaluate_s"] = time.perf_counter() - start
+
+    path = write_artifact(preprocessor, booster, artifact_dir, data_path=data_path, metrics={**metrics, **timings})
+    save_report(report, path)
+    print(format_summary(report))
+    print(f"Artefato exportado em: {path.resolve()}")
+    return path, metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treino out-of-core (bases maiores que a RAM).")
+    parser.add_argument("data", help="CSV rotulado (inclui HeartDisease)")
+    parser.add_argument("--artifact-dir", default="../Model/artifact")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--cache-dir", default=None, help="Onde o XGBoost grava as páginas externas")
+    args = parser.parse_args(argv)
+
+    _, metrics = train_out_of_core(args.data, args.artifact_dir, args.chunk_size, cache_dir=args.cache_dir)
+    print(f"Holdout: {metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# tuning.py
+# Responsável por:
+# - Buscar hiperparâmetros do XGBoost com validação cruzada estratificada (k-fold)
+# - Ajustar o pré-processamento UMA vez por fold e guardar a matriz densa float32,
+#   reaproveitada por todos os candidatos
+# - Avaliar candidatos em paralelo (pool de processos) com early stopping e tree_method="hist"
+# - Podar candidatos ruins por successive halving, respeitando um limite de tempo total
+# - Treinar e salvar o melhor pipeline pelo caminho de sempre (train_and_save_model)
+
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterSampler, StratifiedKFold
+from xgboost import XGBClassifier
+
+from evaluation import DEFAULT_RECALL_TARGET
+from preprocessing import build_preprocessor, prepare_data
+
+
+# Espaço de busca (amostrado aleatoriamente, semente fixa)
+DEFAULT_SEARCH_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "learning_rate": [0.02, 0.05, 0.1, 0.2],
+    "subsample": [0.7, 0.8, 0.9, 1.0],
+    "colsample_bytree": [0.6, 0.8, 0.9, 1.0],
+    "min_child_weight": [1, 3, 5, 10],
+    "reg_lambda": [0.5, 1.0, 2.0, 5.0]
+}
+
+EARLY_STOPPING_ROUNDS = 25
+
+# Folds em cache no processo (preenchido pelo inicializador do pool)
+_FOLDS = None
+
+
+# 1) Folds pré-processados (uma vez por fold)
+
+def build_fold_cache(X, y, n_splits: int = 5, random_state: int = 42):
+
+    # Para cada fold: ajusta o ColumnTransformer só na parte de treino (sem vazamento)
+    # e guarda treino/validação como matrizes densas float32.
+
+    y = np.asarray(y)
+    folds = []
+    splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+
+    for train_idx, val_idx in splitter.split(X, y):
+        preprocessor = build_preprocessor()
+        X_tr = preprocessor.fit_transform(X.iloc[train_idx])
+        X_va = preprocessor.transform(X.iloc[val_idx])
+        folds.append((
+            np.ascontiguousarray(X_tr, dtype=np.float32),
+            y[train_idx],
+            np.ascontiguousarray(X_va, dtype=np.float32),
+            y[val_idx]
+        ))
+
+    return folds
+
+
+# 2) Avaliação de um candidato (roda dentro dos processos do pool)
+
+def _init_worker(folds):
+    global _FOLDS
+    _FOLDS = folds
+
+
+class _Deadline(xgb.callback.TrainingCallback):
+
+    # Interrompe o treino quando passa do prazo (time.time(): o relógio é o mesmo
+    # no processo principal e nos workers). O resultado sai marcado como truncado.
+
+    def __init__(self, deadline: float):
+        super().__init__()
+        self.deadline = deadline
+        self.hit = False
+
+    def after_iteration(self, model, epoch, evals_log) -> bool:
+        self.hit = time.time() >= self.deadline
+        return self.hit
+
+
+def _evaluate(params: dict, n_rounds: int, deadline: float = None) -> dict:
+
+    # AUC média nos folds com até n_rounds árvores (early stopping na validação).
+    # Com deadline, para no meio ao estourar o prazo e devolve truncated=True.
+
+    aucs, best_iterations = [], []
+    truncated = False
+
+    for X_tr, y_tr, X_va, y_va in _FOLDS:
+        if deadline is not None and time.time() >= deadline:
+            truncated = True
+            break
+        callbacks = [_Deadline(deadline)] if deadline is not None else None
+        model = XGBClassifier(
+            **params,
+            n_estimators=n_rounds,
+            tree_method="hist",
+            eval_metric="auc",
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            random_state=42,
+            n_jobs=1,
+            callbacks=callbacks
+        )
+        model.fit(X_tr, y_tr, eval_set=[(X_va, y_va)], verbose=False)
+        if callbacks and callbacks[0].hit:
+            truncated = True
+            break
+        aucs.append(roc_auc_score(y_va, model.predict_proba(X_va)[:, 1]))
+        best_iterations.append(model.best_iteration)
+
+    if truncated:
+        return {"params": params, "n_rounds": n_rounds, "truncated": True}
+
+    return {
+        "params": params,
+        "n_rounds": n_rounds,
+        "auc": float(np.mean(aucs)),
+        "auc_std": float(np.std(aucs)),
+        "best_iteration": int(round(np.mean(best_iterations))),
+        "truncated": False
+    }
+
+
+# 3) Successive halving com limite de tempo
+
+def tune_hyperparameters(
+    X_train,
+    y_train,
+    n_candidates: int = 27,
+    n_splits: int = 5,
+    min_rounds: int = 50,
+    max_rounds: int = 800,
+    eta: int = 3,
+    time_budget: float = 300.0,
+    n_jobs: int = -1,
+    search_space: dict = None,
+    random_state: int = 42
+) -> dict:
+    """
+    Busca hiperparâmetros por successive halving: todos os candidatos começam com
+    min_rounds árvores; a cada rodada só o melhor 1/eta segue, com eta vezes mais árvores.
+    Retorna dict com best_params (prontos para XGBClassifier), best_auc e o histórico.
+    """
+
+    start = time.perf_counter()
+    deadline = start + time_budget
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+
+    folds = build_fold_cache(X_train, y_train, n_splits, random_state)
+    candidates = list(ParameterSampler(
+        search_space or DEFAULT_SEARCH_SPACE, n_iter=n_candidates, random_state=random_state
+    ))
+
+    history = []
+    best = None
+    n_rounds = min_rounds
+
+    # O prazo também vai para os workers (callback _Deadline): avaliações em andamento
+    # param sozinhas em vez de segurar o fim da busca até terminarem
+    wall_deadline = time.time() + time_budget
+
+    executor = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(folds,))
+    out_of_time = False
+    try:
+        while candidates:
+            pending = {executor.submit(_evaluate, params, n_rounds, wall_deadline) for params in candidates}
+            results = []
+
+            while pending:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result["truncated"]:
+                        out_of_time = True
+                    else:
+                        results.append(result)
+
+            out_of_time = out_of_time or bool(pending)
+
+            history.extend(results)
+            results.sort(key=lambda r: r["auc"], reverse=True)
+
+            # Um resultado com mais árvores substitui o melhor anterior (é uma avaliação mais completa)
+            if results:
+                best = results[0]
+
+            if out_of_time or len(results) <= 1 or n_rounds >= max_rounds:
+                break
+
+            keep = max(1, math.ceil(len(results) / eta))
+            candidates = [r["params"] for r in results[:keep]]
+            n_rounds = min(n_rounds * eta, max_rounds)
+    finally:
+        # Sem esperar as avaliações em andamento quando o tempo acabou (o with esperaria)
+        executor.shutdown(wait=not out_of_time, cancel_futures=True)
+
+    if best is None:
+        raise TimeoutError("Nenhum candidato terminou dentro do limite de tempo")
+
+    best_params = {
+        **best["params"],
+        "n_estimators": best["best_iteration"] + 1,
+        "tree_method": "hist"
+    }
+
+    return {
+        "best_params": best_params,
+        "best_auc": best["auc"],
+        "elapsed_s": time.perf_counter() - start,
+        "n_evaluations": len(history),
+        "history": history
+    }
+
+
+# 4) Tuning + treino final
+
+def tune_and_save_model(
+    data_path: str,
+    save_path: str = "../Model/model.joblib",
+    artifact_dir: str = "../Model/artifact",
+    cache_dir: str = None,
+    recall_target: float = DEFAULT_RECALL_TARGET,
+    **tune_kwargs
+) -> Path:
+    """
+    Roda o tuning no conjunto de treino e salva o melhor pipeline como hoje
+    (model.joblib + artefato). O relatório do tuning vai para artifact_dir/tuning.json.
+    cache_dir e recall_target seguem para o treino final (train_and_save_model); o
+    tuning em si precisa do treino bruto, porque ajusta o pré-processamento por fold.
+    """
+
+    # Import local: train.py importa este módulo no modo --tune
+    from train import train_and_save_model
+
+    X_train, _, y_train, _, _ = prepare_data(data_path)
+    result = tune_hyperparameters(X_train, y_train, **tune_kwargs)
+
+    print(
+        f"Melhor AUC (CV): {result['best_auc']:.4f} em {result['elapsed_s']:.1f} s "
+        f"({result['n_evaluations']} avaliações)"
+    )
+    print(f"Melhores parâmetros: {result['best_params']}")
+
+    saved = train_and_save_model(
+        data_path, save_path, artifact_dir,
+        model_params=result["best_params"],
+        cache_dir=cache_dir,
+        recall_target=recall_target
+    )
+
+    if artifact_dir is not None:
+        with open(Path(artifact_dir) / "tuning.json", "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    return saved
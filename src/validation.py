@@ -0,0 +1,199 @@
+# validation.py
+# Responsável por:
+# - Validar lotes de pacientes ANTES do pipeline, com máscaras booleanas por coluna
+#   (sem laços por linha):
+#     * schema: as 11 features de get_feature_groups() presentes
+#     * tipo: numéricas precisam ser números
+#     * faixas clínicas plausíveis para as numéricas
+#     * categorias permitidas para as categóricas
+# - Separar o lote em aceitos e rejeitados, com códigos de motivo por linha
+#   (ex.: "Age:fora_da_faixa;ChestPainType:categoria_desconhecida")
+
+# Obs.: sem esta etapa, uma ChestPainType desconhecida vira uma linha de zeros no
+# OneHotEncoder(handle_unknown="ignore") e o modelo pontua o paciente como se a
+# feature não existisse. Aqui essas linhas são recusadas com o motivo.
+
+# Valores ausentes (e os zeros de RestingBP/Cholesterol, ver preprocess_dataframe)
+# continuam aceitos por padrão: o pipeline os imputa. allow_missing=False os recusa.
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import INVALID_ZERO_FEATURES, get_feature_groups
+
+
+# Faixas plausíveis (inclusivas), bem mais largas que as do heart.csv: o objetivo é
+# barrar erros de digitação/unidade, não casos clínicos raros
+CLINICAL_RANGES = {
+    "Age": (1, 120),
+    "RestingBP": (50, 260),
+    "Cholesterol": (50, 700),
+    "MaxHR": (40, 250),
+    "Oldpeak": (-5.0, 10.0)
+}
+
+ALLOWED_CATEGORIES = {
+    "Sex": ("M", "F"),
+    "ChestPainType": ("ASY", "ATA", "NAP", "TA"),
+    # Comparação por valor: 0/1 e 0.0/1.0 passam; "0"/"1" (texto) não, porque o
+    # OneHotEncoder foi ajustado com inteiros e ignoraria o texto
+    "FastingBS": (0, 1),
+    "RestingECG": ("Normal", "ST", "LVH"),
+    "ExerciseAngina": ("N", "Y"),
+    "ST_Slope": ("Up", "Flat", "Down")
+}
+
+REASONS_COLUMN = "rejection_reasons"
+
+MISSING_COLUMN = "coluna_ausente"
+NOT_NUMERIC = "nao_numerico"
+OUT_OF_RANGE = "fora_da_faixa"
+UNKNOWN_CATEGORY = "categoria_desconhecida"
+MISSING_VALUE = "valor_ausente"
+
+
+class ValidationResult:
+
+    # accepted/rejected preservam o índice original; reasons cobre o lote inteiro
+    # ("" para as linhas aceitas).
+
+    def __init__(self, df: pd.DataFrame, checks):
+        self.checks = checks
+        rejected = np.zeros(len(df), dtype=bool)
+        for _, mask in checks:
+            rejected |= mask
+
+        self.rejected_mask = rejected
+        self.reasons = pd.Series(_join_reasons(checks, rejected), index=df.index, name=REASONS_COLUMN)
+
+        if not rejected.any():
+            # Caso comum: nenhuma cópia do lote
+            self.accepted = df
+            self.rejected = df.iloc[:0].assign(**{REASONS_COLUMN: self.reasons.iloc[:0]})
+        else:
+            self.accepted = df[~rejected]
+            self.rejected = df[rejected].assign(**{REASONS_COLUMN: self.reasons[rejected]})
+
+    @property
+    def n_rejected(self) -> int:
+        return int(self.rejected_mask.sum())
+
+    def summary(self) -> dict:
+
+        # Contagem por código de motivo (uma linha pode ter vários motivos).
+
+        counts = {code: int(mask.sum()) for code, mask in self.checks}
+        return {code: n for code, n in counts.items() if n}
+
+
+def _join_reasons(checks, rejected) -> np.ndarray:
+
+    # Monta as strings de motivo só para as linhas rejeitadas, um código por vez.
+
+    reasons = np.full(len(rejected), "", dtype=object)
+    if not rejected.any():
+        return reasons
+
+    sub = np.full(int(rejected.sum()), "", dtype=object)
+    for code, mask in checks:
+        hit = mask[rejected]
+        if hit.any():
+            sub[hit] = np.where(sub[hit] == "", code, sub[hit] + ";" + code)
+    reasons[rejected] = sub
+    return reasons
+
+
+def _as_numeric(column: pd.Series) -> np.ndarray:
+
+    # Caminho rápido para colunas já numéricas (o caso comum); texto vira NaN.
+
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        return column.to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+    return pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _known_categories(column: pd.Series, allowed) -> np.ndarray:
+
+    # category: checa só o vocabulário (poucos valores) e expande pelos códigos.
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        ok = np.append(pd.Index(column.cat.categories).isin(allowed), False)
+        return ok[column.cat.codes.to_numpy()]
+    values = column.to_numpy()
+    if values.dtype.kind in "iuf":
+        return np.isin(values, [a for a in allowed if not isinstance(a, str)])
+    return pd.Index(values).isin(allowed)
+
+
+def validate_batch(df: pd.DataFrame, allow_missing: bool = True) -> ValidationResult:
+    """
+    Valida um lote bruto (as 11 features, antes do preprocess_dataframe).
+    Retorna um ValidationResult com accepted, rejected (+ coluna rejection_reasons),
+    reasons alinhado ao lote e summary() com a contagem por motivo.
+    """
+
+    num_features, cat_features = get_feature_groups()
+    n = len(df)
+    checks = []
+
+    for f in num_features:
+        if f not in df.columns:
+            checks.append((f"{f}:{MISSING_COLUMN}", np.ones(n, dtype=bool)))
+            continue
+
+        column = df[f]
+        values = _as_numeric(column)
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            raw_missing = np.isnan(values)
+        else:
+            raw_missing = column.isna().to_numpy()
+        not_numeric = np.isnan(values) & ~raw_missing
+
+        missing = raw_missing.copy()
+        if f in INVALID_ZERO_FEATURES:
+            missing |= values == 0
+
+        low, high = CLINICAL_RANGES[f]
+        with np.errstate(invalid="ignore"):
+            out_of_range = ~missing & ~np.isnan(values) & ((values < low) | (values > high))
+
+        checks.append((f"{f}:{NOT_NUMERIC}", not_numeric))
+        checks.append((f"{f}:{OUT_OF_RANGE}", out_of_range))
+        if not allow_missing:
+            checks.append((f"{f}:{MISSING_VALUE}", missing))
+
+    for f in cat_features:
+        if f not in df.columns:
+            checks.append((f"{f}:{MISSING_COLUMN}", np.ones(n, dtype=bool)))
+            continue
+
+        column = df[f]
+        missing = pd.isna(column.to_numpy()) if column.dtype == object else column.isna().to_numpy()
+        known = _known_categories(column, ALLOWED_CATEGORIES[f])
+
+        checks.append((f"{f}:{UNKNOWN_CATEGORY}", ~known & ~missing))
+        if not allow_missing:
+            checks.append((f"{f}:{MISSING_VALUE}", missing))
+
+    return ValidationResult(df, checks)
+
+
+if __name__ == "__main__":
+    import timeit
+
+    df = pd.read_csv("../Data/heart.csv").drop(columns=["HeartDisease"])
+    result = validate_batch(df)
+    print(f"heart.csv: {len(result.accepted)} aceitas, {result.n_rejected} rejeitadas {result.summary()}")
+
+    broken = df.head(5).astype(object)
+    broken.loc[0, "Age"] = 250
+    broken.loc[1, "ChestPainType"] = "XYZ"
+    broken.loc[2, "MaxHR"] = -10
+    broken.loc[2, "FastingBS"] = "1"
+    print(validate_batch(broken).rejected[[REASONS_COLUMN]])
+
+    big = df.sample(100_000, replace=True, random_state=0)
+    t = timeit.timeit(lambda: validate_batch(big), number=5) / 5
+    print(f"100k linhas: {t * 1e3:.1f} ms")
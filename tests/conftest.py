@@ -0,0 +1,30 @@
+# conftest.py
+# Responsável por:
+# - Deixar os módulos de src/ importáveis pelos testes (o projeto não é um pacote)
+# - Fixtures compartilhadas: caminhos do repositório, pipeline salvo e split do train.py
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+MODEL_PATH = ROOT / "Model" / "model.joblib"
+DATA_PATH = ROOT / "Data" / "heart.csv"
+
+sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture(scope="session")
+def pipeline():
+    import joblib
+    return joblib.load(MODEL_PATH)
+
+
+@pytest.fixture(scope="session")
+def split():
+    # (X_train, X_test, y_train, y_test) do mesmo prepare_data do train.py
+    from preprocessing import prepare_data
+    X_train, X_test, y_train, y_test, _ = prepare_data(str(DATA_PATH))
+    return X_train, X_test, y_train, y_test
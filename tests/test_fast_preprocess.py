@@ -0,0 +1,58 @@
+# Pré-processador compilado (fast_preprocess.py) contra o ColumnTransformer do pipeline.
+
+import math
+
+import numpy as np
+import pytest
+
+from fast_preprocess import CompiledPreprocessor, check_equivalence
+from preprocessing import INVALID_ZERO_FEATURES, preprocess_dataframe
+
+
+@pytest.fixture(scope="module")
+def raw_test(split):
+
+    # Teste do train.py "sujo" como chega da API: zeros inválidos, ausentes e
+    # categorias que o one-hot não viu no treino.
+
+    _, X_test, _, _ = split
+    df = X_test.copy()
+    cat_columns = df.select_dtypes("category").columns
+    df[cat_columns] = df[cat_columns].astype(object)
+
+    rows = df.index
+    for i, feature in enumerate(INVALID_ZERO_FEATURES):
+        df.loc[rows[i::6], feature] = 0
+        df.loc[rows[i + 2::6], feature] = np.nan
+    df.loc[rows[4::10], "ChestPainType"] = "DESCONHECIDO"
+    df.loc[rows[5::10], "ST_Slope"] = "Nenhum"
+    df.loc[rows[7::10], "Sex"] = None
+    return df
+
+
+def _expected(pipeline, df):
+    return pipeline.named_steps["preprocess"].transform(preprocess_dataframe(df))
+
+
+def test_transform_columns_matches_sklearn(pipeline, raw_test):
+    compiled = CompiledPreprocessor.from_pipeline(pipeline, dtype=np.float64)
+    assert np.array_equal(compiled.transform_columns(raw_test), _expected(pipeline, raw_test))
+
+
+def test_transform_one_matches_sklearn(pipeline, raw_test):
+    compiled = CompiledPreprocessor.from_pipeline(pipeline, dtype=np.float64)
+
+    # Ausentes como None, do jeito que chegam num JSON
+    records = [
+        {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in record.items()}
+        for record in raw_test.to_dict(orient="records")
+    ]
+    rows = np.vstack([compiled.transform_one(record) for record in records])
+    assert np.array_equal(rows, _expected(pipeline, raw_test))
+
+
+def test_float32_output_and_check_equivalence(pipeline, raw_test):
+    compiled = CompiledPreprocessor.from_pipeline(pipeline)
+    expected = _expected(pipeline, raw_test).astype(np.float32)
+    assert np.array_equal(compiled.transform_columns(raw_test), expected)
+    assert check_equivalence(pipeline, raw_test)
@@ -0,0 +1,36 @@
+# Atualização incremental (incremental.py): árvores e contagem acumuladas entre atualizações.
+
+import shutil
+
+import joblib
+
+from conftest import DATA_PATH, MODEL_PATH
+from incremental import load_state, update_model
+
+
+def test_consecutive_updates_accumulate(tmp_path):
+    model_path = tmp_path / "current" / "model.joblib"
+    save_path = tmp_path / "promoted" / "model.joblib"
+    model_path.parent.mkdir()
+    shutil.copy(MODEL_PATH, model_path)
+
+    # tolerance alta força a promoção; o que importa aqui é o que fica persistido
+    reports = [
+        update_model(
+            str(DATA_PATH), model_path=str(model_path), save_path=str(save_path),
+            n_new_trees=2, tolerance=1.0
+        )
+        for _ in range(2)
+    ]
+    assert all(report["promoted"] for report in reports)
+
+    # A segunda atualização parte do modelo promovido pela primeira
+    assert reports[1]["n_trees_before"] == reports[0]["n_trees_after"]
+    assert reports[1]["n_trees_after"] == reports[0]["n_trees_before"] + 4
+
+    classifier = joblib.load(save_path).named_steps["model"]
+    assert classifier.get_params()["n_estimators"] == classifier.get_booster().num_boosted_rounds()
+
+    state = load_state(save_path)
+    assert state["updates_since_full_train"] == 2
+    assert len(state["history"]) == 2
@@ -0,0 +1,61 @@
+# Avaliador NumPy (numpy_trees.py) contra o predict_proba do XGBoost.
+
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import SRC
+from numpy_trees import NumpyTreeEnsemble, verify_against_xgboost
+
+ATOL = 1e-6
+
+
+def _max_diff(pipeline, X):
+    expected = pipeline.named_steps["model"].predict_proba(X)[:, 1]
+    actual = NumpyTreeEnsemble.from_pipeline(pipeline).predict_proba(X)[:, 1]
+    return float(np.max(np.abs(actual - expected)))
+
+
+def test_matches_xgboost_on_test_split(pipeline, split):
+    _, X_test, _, _ = split
+    X = pipeline.named_steps["preprocess"].transform(X_test)
+    assert _max_diff(pipeline, X) <= ATOL
+
+    report = verify_against_xgboost(pipeline, X_test, atol=ATOL)
+    assert report["ok"], report
+
+
+def test_missing_values_follow_default_direction(pipeline, split):
+    _, X_test, _, _ = split
+    X = np.asarray(pipeline.named_steps["preprocess"].transform(X_test), dtype=np.float32)
+
+    # Colunas transformadas de Cholesterol e RestingBP como ausentes (NaN chega ao
+    # booster e segue default_left em cada nó)
+    num_features = pipeline.named_steps["preprocess"].transformers_[0][2]
+    for feature in ("Cholesterol", "RestingBP"):
+        X_missing = X.copy()
+        X_missing[::2, list(num_features).index(feature)] = np.nan
+        assert _max_diff(pipeline, X_missing) <= ATOL
+
+
+def test_numpy_backend_imports_neither_xgboost_nor_sklearn(pipeline, split, tmp_path):
+    from artifact import export_artifact
+
+    _, X_test, _, _ = split
+    artifact_dir = export_artifact(pipeline, tmp_path / "artifact")
+    X_test.iloc[:20].to_csv(tmp_path / "patients.csv", index=False)
+
+    # Processo novo: o processo do pytest já importou os dois
+    code = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(SRC)!r})\n"
+        "import pandas as pd\n"
+        "from artifact import load_artifact\n"
+        "from preprocessing import preprocess_dataframe\n"
+        f"scorer = load_artifact({str(artifact_dir)!r}, backend='numpy')\n"
+        f"scorer.predict_proba(preprocess_dataframe(pd.read_csv({str(tmp_path / 'patients.csv')!r})))\n"
+        "print(sorted(m for m in ('xgboost', 'sklearn') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
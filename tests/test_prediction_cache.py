@@ -0,0 +1,39 @@
+# Cache de predições (prediction_cache.py): a chave não pode juntar entradas que o pipeline distingue.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from conftest import MODEL_PATH
+from prediction_cache import PredictionCache
+from preprocessing import preprocess_dataframe
+
+
+def _direct(pipeline, patient, columns):
+    X = preprocess_dataframe(pd.DataFrame([patient], columns=columns))
+    return float(pipeline.predict_proba(X)[0, 1])
+
+
+def test_none_and_nan_categories_are_cached_separately(pipeline, split):
+    _, X_test, _, _ = split
+    cache = PredictionCache(str(MODEL_PATH), model=pipeline)
+    columns = cache.num_features + cache.cat_features
+    patient = X_test.astype(object).iloc[0].to_dict()
+
+    with_none = {**patient, "Sex": None}
+    with_nan = {**patient, "Sex": math.nan}
+    without = {k: v for k, v in patient.items() if k != "Sex"}
+
+    expected_none = _direct(pipeline, with_none, columns)
+    expected_nan = _direct(pipeline, with_nan, columns)
+    assert expected_none != expected_nan
+
+    assert cache.score(with_none)["probability"] == expected_none
+    assert cache.score(with_nan)["probability"] == expected_nan
+    # Ausente do dict = NaN no DataFrame: mesmo resultado, e hit
+    assert cache.score(without)["probability"] == expected_nan
+    assert cache.stats()["hits"] == 1
+    np.testing.assert_array_equal(
+        cache.predict_proba_many([with_nan, with_none]), [expected_nan, expected_none]
+    )
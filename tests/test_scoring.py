@@ -0,0 +1,29 @@
+# Pontuação (scoring.py): faixas de risco nos limites exatos do texto do dashboard.
+
+import numpy as np
+import pytest
+
+from scoring import build_result_frame, patient_result, risk_band
+
+EDGE_CASES = [
+    (0.0, "baixo"),
+    (0.2999, "baixo"),
+    (0.30, "moderado"),
+    (0.50, "moderado"),
+    (0.70, "moderado"),
+    (0.7001, "alto"),
+    (1.0, "alto")
+]
+
+
+@pytest.mark.parametrize("probability, band", EDGE_CASES)
+def test_risk_band_edges(probability, band):
+    assert risk_band(probability) == band
+    assert patient_result(probability)["risk_band"] == band
+
+
+def test_risk_band_array_matches_scalar():
+    probabilities = np.array([p for p, _ in EDGE_CASES])
+    expected = [band for _, band in EDGE_CASES]
+    assert list(risk_band(probabilities)) == expected
+    assert build_result_frame(probabilities)["risk_band"].tolist() == expected
@@ -0,0 +1,14 @@
+# Rota /predict do servidor (server.py): corpos JSON que não são um paciente.
+
+import asyncio
+
+import pytest
+
+from server import ScoringServer
+
+
+@pytest.mark.parametrize("body", [b"5", b'"texto"', b"null", b'[{"Age": 50}]', b"[]"])
+def test_predict_rejects_non_object_body(pipeline, body):
+    status, payload = asyncio.run(ScoringServer(pipeline)._route("POST", "/predict", body))
+    assert status == 400
+    assert "error" in payload
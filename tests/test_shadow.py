@@ -0,0 +1,58 @@
+# Modo sombra (shadow.py): falhas de desafiantes nunca chegam à resposta do campeão.
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from fast_preprocess import CompiledPreprocessor
+from shadow import CHAMPION, ShadowScorer
+
+
+def _raise(*args):
+    raise RuntimeError("desafiante quebrado")
+
+
+class _BrokenPreprocessor(CompiledPreprocessor):
+    def transform_columns(self, columns, out=None):
+        _raise()
+
+
+@pytest.fixture
+def scorer(pipeline):
+    preprocessor = CompiledPreprocessor.from_pipeline(pipeline)
+    # Outra impressão digital: ganha uma passada de pré-processamento só sua
+    broken = _BrokenPreprocessor(
+        preprocessor.num_features, preprocessor.medians + 1.0, preprocessor.means, preprocessor.scales,
+        preprocessor.cat_features, preprocessor.cat_fill, preprocessor.categories
+    )
+    scorer = ShadowScorer({
+        CHAMPION: pipeline,
+        "broken_predict": SimpleNamespace(preprocessor=preprocessor, booster=SimpleNamespace(inplace_predict=_raise)),
+        "broken_preprocess": SimpleNamespace(preprocessor=broken, booster=SimpleNamespace(inplace_predict=_raise)),
+        "healthy": pipeline
+    })
+    assert scorer.preprocess_passes == 2
+    return scorer
+
+
+def test_challenger_errors_do_not_affect_champion(pipeline, split, scorer):
+    _, X_test, _, _ = split
+
+    probabilities = scorer.predict_proba(X_test)
+    np.testing.assert_array_equal(probabilities[:, 1], pipeline.predict_proba(X_test)[:, 1])
+
+    scorer.flush()
+    models = scorer.snapshot()["models"]
+    assert models["broken_predict"]["errors"] == 1 and models["broken_predict"]["rows"] == 0
+    assert models["broken_preprocess"]["errors"] == 1 and models["broken_preprocess"]["rows"] == 0
+    assert models["healthy"]["rows"] == len(X_test) and models["healthy"]["agreement"] == 1.0
+    assert models[CHAMPION]["rows"] == len(X_test)
+
+
+def test_score_all_leaves_failed_challengers_empty(split, scorer):
+    _, X_test, _, _ = split
+    scores = scorer.score_all(X_test)
+    assert list(scores.columns) == scorer.names
+    assert scores["broken_predict"].isna().all() and scores["broken_preprocess"].isna().all()
+    np.testing.assert_array_equal(scores["healthy"], scores[CHAMPION])
@@ -0,0 +1,19 @@
+# Treino out-of-core (train_out_of_core.py): tradução dos parâmetros para a API nativa.
+
+import pytest
+
+from train_out_of_core import booster_params
+
+
+def test_tuned_params_reach_the_native_booster():
+    params = booster_params({"min_child_weight": 5, "reg_lambda": 2.0, "reg_alpha": 0.5, "gamma": 1.0})
+    assert params["min_child_weight"] == 5
+    assert params["lambda"] == 2.0
+    assert params["alpha"] == 0.5
+    assert params["gamma"] == 1.0
+    assert "reg_lambda" not in params and "n_estimators" not in params
+
+
+def test_unknown_param_is_rejected():
+    with pytest.raises(ValueError, match="max_dept"):
+        booster_params({"max_dept": 4})
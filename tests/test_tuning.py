@@ -0,0 +1,31 @@
+# Limite de tempo do tuning (tuning.tune_hyperparameters) é de relógio, não só de agendamento.
+
+import time
+
+import tuning
+from tuning import tune_hyperparameters
+
+SLOW_SPACE = {"max_depth": [6, 8], "learning_rate": [0.001, 0.002], "subsample": [0.8, 1.0]}
+
+
+def test_time_budget_is_a_wall_clock_limit(split, monkeypatch):
+    X_train, _, y_train, _ = split
+
+    # Sem early stopping, cada avaliação treina todas as árvores e leva vários segundos:
+    # sem o prazo nos workers, o fim da busca esperaria as avaliações em andamento
+    # (os workers herdam o valor via fork)
+    monkeypatch.setattr(tuning, "EARLY_STOPPING_ROUNDS", None)
+    budget = 1.0
+
+    start = time.perf_counter()
+    try:
+        tune_hyperparameters(
+            X_train, y_train, n_candidates=6, min_rounds=2000, max_rounds=20000,
+            time_budget=budget, n_jobs=2, search_space=SLOW_SPACE
+        )
+    except TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    # Folga para o cache de folds e a inicialização do pool
+    assert elapsed <= budget + 1.0, elapsed